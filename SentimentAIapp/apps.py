@@ -1,6 +1,17 @@
+import os
+import sys
+
 from django.apps import AppConfig
 
 
 class SentimentaiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
-    name = "SentimentAI"
+    name = "SentimentAIapp"
+
+    def ready(self):
+        # Only the process that serves requests runs jobs, not the runserver autoreloader or other commands.
+        # Gunicorn workers start theirs from post_worker_init in gunicorn.conf.py.
+        if 'runserver' in sys.argv and ('--noreload' in sys.argv or os.environ.get('RUN_MAIN') == 'true'):
+            from . import jobs
+
+            jobs.start_inline_workers()
@@ -5,12 +5,11 @@ from rest_framework.decorators import api_view
 from django.contrib.auth import authenticate, login, logout
 from django.views.decorators.csrf import csrf_exempt
 from .models import UserProfile
+from .tokens import get_token_backend, user_from_snapshot
 import json
 import secrets
 import hashlib
 
-user_tokens = {}
-
 def generate_token():
     """Generate a secure token"""
     return secrets.token_urlsafe(32)
@@ -83,10 +82,7 @@ def login_user(request):
         if user is not None:
             if user.is_active:
                 token = generate_token()
-                user_tokens[hash_token(token)] = {
-                    'user_id': user.id,
-                    'username': user.username
-                }
+                get_token_backend().issue(hash_token(token), user)
                 
                 try:
                     profile, created = UserProfile.objects.get_or_create(user=user)
@@ -118,9 +114,7 @@ def logout_user(request):
         auth_header = request.META.get('HTTP_AUTHORIZATION', '')
         if auth_header.startswith('Bearer '):
             token = auth_header.split(' ')[1]
-            token_hash = hash_token(token)
-            if token_hash in user_tokens:
-                del user_tokens[token_hash]
+            get_token_backend().revoke(hash_token(token))
         
         return Response({'message': 'Logout successful'}, status=status.HTTP_200_OK)
     except Exception as e:
@@ -134,10 +128,9 @@ def check_auth_status(request):
         auth_header = request.META.get('HTTP_AUTHORIZATION', '')
         if auth_header.startswith('Bearer '):
             token = auth_header.split(' ')[1]
-            token_hash = hash_token(token)
+            user_data = get_token_backend().resolve(hash_token(token))
             
-            if token_hash in user_tokens:
-                user_data = user_tokens[token_hash]
+            if user_data:
                 return Response({
                     'authenticated': True,
                     'username': user_data['username'],
@@ -160,11 +153,10 @@ def get_user_from_token(request):
         auth_header = request.META.get('HTTP_AUTHORIZATION', '')
         if auth_header.startswith('Bearer '):
             token = auth_header.split(' ')[1]
-            token_hash = hash_token(token)
+            user_data = get_token_backend().resolve(hash_token(token))
             
-            if token_hash in user_tokens:
-                user_data = user_tokens[token_hash]
-                return User.objects.get(id=user_data['user_id'])
+            if user_data:
+                return user_from_snapshot(user_data)
         
         return None
     except Exception as e:
@@ -0,0 +1,120 @@
+import logging
+import os
+
+import torch
+from django.conf import settings
+
+from .registry import get_backend_name
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ONNX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'model_cache', 'sentiment.onnx')
+
+
+class SentimentBackend:
+    """Runs the sentiment classifier on a padded batch and returns logits"""
+
+    name = None
+
+    def logits(self, input_ids, attention_mask):
+        """Return a float tensor of shape (batch, num_labels)"""
+        raise NotImplementedError
+
+
+class TorchBackend(SentimentBackend):
+    """The fp32 BertForSequenceClassification model"""
+
+    name = 'torch'
+
+    def __init__(self, model_loader):
+        self.model = model_loader()
+        self.model.eval()
+
+    def logits(self, input_ids, attention_mask):
+        with torch.inference_mode():
+            return self.model(input_ids=input_ids, attention_mask=attention_mask).logits
+
+
+class QuantizedTorchBackend(TorchBackend):
+    """The same model with its Linear layers dynamically quantized to int8"""
+
+    name = 'quantized'
+
+    def __init__(self, model_loader):
+        super().__init__(model_loader)
+        self.model = torch.ao.quantization.quantize_dynamic(
+            self.model,
+            {torch.nn.Linear},
+            dtype=torch.qint8,
+        )
+
+
+class OnnxBackend(SentimentBackend):
+    """ONNX Runtime session over an exported copy of the model
+
+    The model is exported to SENTIMENT_ONNX_PATH the first time; later
+    processes load the exported file without touching the PyTorch weights.
+    """
+
+    name = 'onnx'
+
+    def __init__(self, model_loader):
+        try:
+            import onnxruntime
+        except ImportError as e:
+            raise ImportError("The 'onnx' sentiment backend requires the onnxruntime package") from e
+
+        path = getattr(settings, 'SENTIMENT_ONNX_PATH', DEFAULT_ONNX_PATH)
+        if not os.path.exists(path):
+            self.export(model_loader(), path)
+
+        options = onnxruntime.SessionOptions()
+        num_threads = getattr(settings, 'SENTIMENT_NUM_THREADS', None)
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = onnxruntime.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+
+    @staticmethod
+    def export(model, path):
+        logger.info(f"Exporting sentiment model to ONNX at {path}")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        model.eval()
+        dummy_ids = torch.ones((1, 8), dtype=torch.long)
+        dummy_mask = torch.ones((1, 8), dtype=torch.long)
+        torch.onnx.export(
+            model,
+            (dummy_ids, dummy_mask),
+            path,
+            input_names=['input_ids', 'attention_mask'],
+            output_names=['logits'],
+            dynamic_axes={
+                'input_ids': {0: 'batch', 1: 'sequence'},
+                'attention_mask': {0: 'batch', 1: 'sequence'},
+                'logits': {0: 'batch'},
+            },
+            opset_version=17,
+            dynamo=False,
+        )
+
+    def logits(self, input_ids, attention_mask):
+        outputs = self.session.run(
+            ['logits'],
+            {
+                'input_ids': input_ids.numpy(),
+                'attention_mask': attention_mask.numpy(),
+            },
+        )
+        return torch.from_numpy(outputs[0])
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (TorchBackend, QuantizedTorchBackend, OnnxBackend)
+}
+
+
+def create_backend(model_loader, name=None):
+    name = name or get_backend_name()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown sentiment backend '{name}', expected one of {sorted(BACKENDS)}")
+    return BACKENDS[name](model_loader)
@@ -0,0 +1,161 @@
+import logging
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+from django.db import connection
+
+from . import registry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FETCH_WORKERS = 8
+DEFAULT_THREADS_PER_PROCESS = 1
+DEFAULT_MAX_URLS = 50
+MIN_SHARD_SIZE = 64
+
+# Set in each scoring process by _init_scoring_process
+_engine = None
+
+
+def physical_cores():
+    """Physical cores available to this process; without psutil, logical CPUs are counted instead"""
+    available = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()
+    try:
+        import psutil
+    except ImportError:
+        return max(1, available or 1)
+    return max(1, min(psutil.cpu_count(logical=False) or available, available))
+
+
+def _init_scoring_process(num_threads):
+    """Load a local engine in a fresh scoring process with torch pinned to ``num_threads``"""
+    global _engine
+
+    for variable in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS'):
+        os.environ[variable] = str(num_threads)
+
+    import django
+
+    django.setup()
+
+    import torch
+
+    torch.set_num_threads(num_threads)
+    torch.set_num_interop_threads(1)
+    _engine = registry.load_local_engine(num_threads=num_threads)
+
+
+def _score_shard(comments):
+    return _engine.predict(comments)
+
+
+def default_scoring_processes():
+    """Physical cores split between the web workers, since each one that serves a batch request starts its own pool"""
+    web_workers = int(os.environ.get('WEB_CONCURRENCY', 1) or 1)
+    return max(1, physical_cores() // web_workers)
+
+
+def create_scoring_pool():
+    """Process pool engine for this web worker, loaded lazily through the registry"""
+    processes = getattr(settings, 'BATCH_SCORING_PROCESSES', None) or default_scoring_processes()
+    num_threads = getattr(settings, 'BATCH_THREADS_PER_PROCESS', DEFAULT_THREADS_PER_PROCESS)
+    logger.info(f"Starting {processes} scoring processes with {num_threads} torch threads each")
+    # spawn rather than fork: forking a web worker that already runs threads (and maybe torch) can deadlock
+    pool = ProcessPoolExecutor(
+        max_workers=processes,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_scoring_process,
+        initargs=(num_threads,),
+    )
+    return ProcessPoolEngine(pool, processes)
+
+
+class ProcessPoolEngine:
+    """Engine that shards each call across a pool of scoring processes"""
+
+    def __init__(self, pool, processes):
+        self.pool = pool
+        self.processes = processes
+
+    def iter_predict(self, comments):
+        """Yield ``(indices, labels)`` per shard, in completion order"""
+        if not comments:
+            return
+        shard_size = max(MIN_SHARD_SIZE, math.ceil(len(comments) / self.processes))
+        futures = {
+            self.pool.submit(_score_shard, comments[start:start + shard_size]): start
+            for start in range(0, len(comments), shard_size)
+        }
+        for future in as_completed(futures):
+            start = futures[future]
+            labels = future.result()
+            yield list(range(start, start + len(labels))), labels
+
+    def predict(self, comments, on_batch=None):
+        labels = [None] * len(comments)
+        for indices, batch_labels in self.iter_predict(comments):
+            for index, label in zip(indices, batch_labels):
+                labels[index] = label
+            if on_batch:
+                on_batch(len(indices))
+        return labels
+
+
+def rollup(results):
+    """Combine per-URL insights into totals weighted by each URL's comment count"""
+    succeeded = [result for result in results if 'error' not in result]
+    total = sum(result['total_comments'] for result in succeeded)
+
+    def combined(field):
+        count = sum(result[field] * result['total_comments'] / 100 for result in succeeded)
+        return round(count / total * 100, 2) if total else 0
+
+    platforms = {}
+    for result in succeeded:
+        platforms[result['platform']] = platforms.get(result['platform'], 0) + result['total_comments']
+
+    return {
+        'urls': len(results),
+        'succeeded': len(succeeded),
+        'failed': len(results) - len(succeeded),
+        'partial': sum(1 for result in succeeded if result.get('partial')),
+        'total_comments': total,
+        'positive_percent': combined('positive_percent'),
+        'negative_percent': combined('negative_percent'),
+        'neutral_percent': combined('neutral_percent'),
+        'purchase_intent_percent': combined('purchase_intent_percent'),
+        'comments_by_platform': platforms,
+    }
+
+
+def get_batch_engine():
+    """The shared inference server when one is configured, otherwise this worker's scoring pool"""
+    if getattr(settings, 'SENTIMENT_INFERENCE_SOCKET', None):
+        return registry.get('sentiment_engine')
+    return registry.get('scoring_pool')
+
+
+def analyze_urls(urls, user, force_refresh=False):
+    """Analyze several URLs: fetching overlaps on threads, scoring is sharded across processes"""
+    from .views import run_url_analysis
+
+    engine = get_batch_engine()
+
+    def analyze(url):
+        try:
+            insights = run_url_analysis(url, user, force_refresh=force_refresh, engine=engine)
+        except Exception as e:
+            logger.error(f"Batch analysis of {url} failed: {e}")
+            insights = {'error': f'Analysis failed: {str(e)}'}
+        finally:
+            connection.close()
+        return {'url': url, **insights}
+
+    urls = list(dict.fromkeys(urls))
+    workers = min(len(urls), getattr(settings, 'BATCH_FETCH_WORKERS', DEFAULT_FETCH_WORKERS))
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="batch-fetch") as executor:
+        results = list(executor.map(analyze, urls))
+    return {'results': results, 'rollup': rollup(results)}
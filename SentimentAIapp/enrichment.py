@@ -0,0 +1,71 @@
+import logging
+
+from django.conf import settings
+
+from . import metrics, registry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_MAX_CHARS = 1000
+DEFAULT_TOP_KEYWORDS = 20
+
+# Entity types worth keeping for comments; numeric types are mostly noise here
+ENTITY_LABELS = {'PERSON', 'ORG', 'PRODUCT', 'GPE', 'LOC', 'NORP', 'EVENT', 'WORK_OF_ART', 'FAC'}
+
+
+def is_enabled():
+    return getattr(settings, 'NLP_ENRICHMENT', True)
+
+
+def chunk_keyword(chunk):
+    """Lowercased noun chunk without stop words, punctuation or pronouns, or None if nothing is left"""
+    words = [
+        token.lower_ for token in chunk
+        if not token.is_stop and not token.is_punct and token.pos_ != 'PRON' and not token.like_url
+    ]
+    keyword = " ".join(words)
+    return keyword if len(keyword) > 1 else None
+
+
+def extract(doc):
+    """Return ``(entities, keywords)`` for one parsed comment"""
+    entities = []
+    seen_entities = set()
+    for ent in doc.ents:
+        key = (ent.text, ent.label_)
+        if ent.label_ in ENTITY_LABELS and key not in seen_entities:
+            seen_entities.add(key)
+            entities.append({'text': ent.text, 'label': ent.label_})
+
+    keywords = []
+    for chunk in doc.noun_chunks:
+        keyword = chunk_keyword(chunk)
+        if keyword and keyword not in keywords:
+            keywords.append(keyword)
+    return entities, keywords
+
+
+def enrich(texts):
+    """Run spaCy over a batch of comments: returns a list of ``(entities, keywords)``, or None if spaCy is unavailable"""
+    nlp = registry.get('nlp')
+    if nlp is None or not texts:
+        return None
+
+    max_chars = getattr(settings, 'NLP_MAX_CHARS', DEFAULT_MAX_CHARS)
+    try:
+        with metrics.stage_seconds.time(stage='enrich'):
+            docs = nlp.pipe(
+                (text[:max_chars] for text in texts),
+                batch_size=getattr(settings, 'NLP_BATCH_SIZE', DEFAULT_BATCH_SIZE),
+                n_process=getattr(settings, 'NLP_N_PROCESS', 1),
+            )
+            return [extract(doc) for doc in docs]
+    except Exception as e:
+        logger.error(f"Error enriching comments: {e}")
+        return None
+
+
+def top_keywords(keyword_counts, limit=None):
+    limit = limit or getattr(settings, 'NLP_TOP_KEYWORDS', DEFAULT_TOP_KEYWORDS)
+    return [{'keyword': keyword, 'count': count} for keyword, count in keyword_counts.most_common(limit)]
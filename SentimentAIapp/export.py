@@ -0,0 +1,241 @@
+import gzip
+import io
+import json
+
+from django.conf import settings
+from django.db import connection
+
+from .models import Comment, AnalysisHistory
+from .queries import QueryParamError, apply_filters
+
+DEFAULT_CHUNK_SIZE = 5000
+
+# (field, type) per export; 'id' must come first, it is the keyset for backends without streaming cursors
+EXPORTS = {
+    'comments': (Comment, [
+        ('id', 'int'),
+        ('user_id', 'int'),
+        ('platform', 'string'),
+        ('content', 'string'),
+        ('sentiment', 'string'),
+        ('purchase_intent', 'bool'),
+        ('entities', 'json'),
+        ('keywords', 'json'),
+        ('created_at', 'datetime'),
+    ]),
+    'history': (AnalysisHistory, [
+        ('id', 'int'),
+        ('user_id', 'int'),
+        ('url', 'string'),
+        ('platform', 'string'),
+        ('positive_percent', 'float'),
+        ('negative_percent', 'float'),
+        ('purchase_intent_percent', 'float'),
+        ('total_comments', 'int'),
+        ('trend_score', 'float'),
+        ('top_keywords', 'json'),
+        ('monitor_id', 'int'),
+        ('created_at', 'datetime'),
+    ]),
+}
+
+FORMATS = {
+    'csv': ('csv', 'text/csv'),
+    'ndjson': ('ndjson', 'application/x-ndjson'),
+    'parquet': ('parquet', 'application/vnd.apache.parquet'),
+}
+
+
+def get_chunk_size(chunk_size=None):
+    return chunk_size or getattr(settings, 'EXPORT_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+
+
+def filename(kind, fmt, compress):
+    extension = FORMATS[fmt][0]
+    return f"{kind}.{extension}.gz" if compress and fmt != 'parquet' else f"{kind}.{extension}"
+
+
+def content_type(fmt, compress):
+    return 'application/gzip' if compress and fmt != 'parquet' else FORMATS[fmt][1]
+
+
+def export_queryset(kind, params, user=None):
+    """Rows of ``kind`` for a user (or everyone), filtered by platform, start, end and sentiment"""
+    if kind not in EXPORTS:
+        raise QueryParamError(f"kind must be one of {sorted(EXPORTS)}")
+    model, _ = EXPORTS[kind]
+    queryset = model.objects.all()
+    if user is not None:
+        queryset = queryset.filter(user=user)
+    return apply_filters(queryset, params, sentiment=(kind == 'comments'))
+
+
+def iter_row_chunks(queryset, fields, chunk_size):
+    """Yield lists of up to ``chunk_size`` value tuples, holding one chunk in memory at a time
+
+    Uses a streaming cursor via ``iterator(chunk_size=...)`` where the
+    backend has one. MySQL's driver buffers whole result sets, so there the
+    rows are read in id-ordered keyset chunks instead.
+    """
+    queryset = queryset.order_by('id')
+    if connection.vendor == 'mysql':
+        last_id = 0
+        while True:
+            rows = list(queryset.filter(id__gt=last_id).values_list(*fields)[:chunk_size])
+            if not rows:
+                return
+            yield rows
+            last_id = rows[-1][0]
+
+    chunk = []
+    for row in queryset.values_list(*fields).iterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class ChunkSink(io.RawIOBase):
+    """Write-only file that buffers bytes until drained, while reporting a true file position"""
+
+    def __init__(self):
+        super().__init__()
+        self.pending = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.pending.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b"".join(self.pending)
+        self.pending = []
+        return data
+
+
+def _frame(rows, columns, json_as_text):
+    import pandas as pd
+
+    frame = pd.DataFrame.from_records(rows, columns=[name for name, _ in columns])
+    for name, kind in columns:
+        if kind == 'int':
+            frame[name] = frame[name].astype('Int64')
+        elif kind == 'json' and json_as_text:
+            frame[name] = frame[name].map(lambda value: None if value is None else json.dumps(value))
+    return frame
+
+
+class TextExportWriter:
+    """Writes frames as text, optionally through a gzip stream"""
+
+    def __init__(self, sink, columns, compress):
+        self.columns = columns
+        self.compress = compress
+        self.stream = gzip.GzipFile(fileobj=sink, mode='wb') if compress else sink
+        self.first = True
+
+    def write(self, rows):
+        self.stream.write(self.format(rows).encode('utf-8'))
+        self.first = False
+
+    def format(self, rows):
+        raise NotImplementedError
+
+    def close(self):
+        if self.compress:
+            self.stream.close()
+
+
+class CsvExportWriter(TextExportWriter):
+    def format(self, rows):
+        return _frame(rows, self.columns, json_as_text=True).to_csv(index=False, header=self.first)
+
+    def close(self):
+        if self.first:
+            self.stream.write((",".join(name for name, _ in self.columns) + "\n").encode('utf-8'))
+        super().close()
+
+
+class NdjsonExportWriter(TextExportWriter):
+    def format(self, rows):
+        text = _frame(rows, self.columns, json_as_text=False).to_json(
+            orient='records',
+            lines=True,
+            date_format='iso',
+            force_ascii=False,
+        )
+        return text if text.endswith("\n") else text + "\n"
+
+
+class ParquetExportWriter:
+    """Writes each chunk as a Parquet row group; gzip becomes the column compression codec"""
+
+    def __init__(self, sink, columns, compress):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa = pa
+        self.columns = columns
+        types = {
+            'int': pa.int64(),
+            'string': pa.string(),
+            'json': pa.string(),
+            'bool': pa.bool_(),
+            'float': pa.float64(),
+            'datetime': pa.timestamp('us', tz='UTC'),
+        }
+        self.schema = pa.schema([(name, types[kind]) for name, kind in columns])
+        self.writer = pq.ParquetWriter(
+            pa.PythonFile(sink, mode='w'),
+            self.schema,
+            compression='gzip' if compress else 'snappy',
+        )
+
+    def write(self, rows):
+        frame = _frame(rows, self.columns, json_as_text=True)
+        self.writer.write_table(self.pa.Table.from_pandas(frame, schema=self.schema, preserve_index=False))
+
+    def close(self):
+        self.writer.close()
+
+
+WRITERS = {
+    'csv': CsvExportWriter,
+    'ndjson': NdjsonExportWriter,
+    'parquet': ParquetExportWriter,
+}
+
+
+def check_format(fmt):
+    """Raise QueryParamError for unknown formats, ImportError when the format's dependency is missing"""
+    if fmt not in WRITERS:
+        raise QueryParamError(f"format must be one of {sorted(WRITERS)}")
+    if fmt == 'parquet':
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as e:
+            raise ImportError("Parquet export requires the pyarrow package") from e
+
+
+def iter_export(queryset, kind, fmt, compress=False, chunk_size=None):
+    """Yield the export file as bytes, one piece per chunk of rows"""
+    check_format(fmt)
+    _, columns = EXPORTS[kind]
+    sink = ChunkSink()
+    writer = WRITERS[fmt](sink, columns, compress)
+    for rows in iter_row_chunks(queryset, [name for name, _ in columns], get_chunk_size(chunk_size)):
+        writer.write(rows)
+        data = sink.drain()
+        if data:
+            yield data
+    writer.close()
+    yield sink.drain()
@@ -0,0 +1,151 @@
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from . import ratelimit
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = (5, 20)
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+DEFAULT_POOL_SIZE = 16
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_PREFETCH_PAGES = 2
+
+USER_AGENT = "Mozilla/5.0"
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def build_session():
+    # 429 is left to ratelimit.call, which backs off every caller on the platform rather than just this one
+    retry = Retry(
+        total=getattr(settings, 'FETCH_RETRIES', DEFAULT_RETRIES),
+        backoff_factor=getattr(settings, 'FETCH_BACKOFF', DEFAULT_BACKOFF),
+        status_forcelist=[500, 502, 503, 504],
+        allowed_methods=["GET"],
+        respect_retry_after_header=True,
+    )
+    pool_size = getattr(settings, 'FETCH_POOL_SIZE', DEFAULT_POOL_SIZE)
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_size, pool_maxsize=pool_size)
+
+    session = requests.Session()
+    session.headers.update({"User-Agent": USER_AGENT})
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session():
+    """Shared pooled session with retries and backoff"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = build_session()
+    return _session
+
+
+def http_get(url, platform=None, credential=None, **kwargs):
+    """GET ``url``; with ``platform``, within that platform's and ``credential``'s rate limits"""
+    kwargs.setdefault('timeout', getattr(settings, 'FETCH_TIMEOUT', DEFAULT_TIMEOUT))
+
+    def request():
+        response = get_session().get(url, **kwargs)
+        if platform and ratelimit.is_throttled(response):
+            raise ratelimit.Throttled(
+                f"{response.status_code} from {urlsplit(url).netloc}",
+                retry_after=ratelimit.retry_after(response.headers),
+            )
+        response.raise_for_status()
+        return response
+
+    if not platform:
+        return request()
+    return ratelimit.call(platform, credential, request)
+
+
+def prefetch(iterable, depth=None):
+    """Iterate ``iterable`` on a background thread, keeping up to ``depth`` items ready
+
+    Used for token-chained pagination, where pages can't be requested in
+    parallel but the next page can download while the current one is consumed.
+    """
+    depth = depth or getattr(settings, 'FETCH_PREFETCH_PAGES', DEFAULT_PREFETCH_PAGES)
+    buffer = queue.Queue(maxsize=depth)
+    done = object()
+    stop = threading.Event()
+
+    def put(entry):
+        """Queue ``entry`` unless the consumer has stopped; returns False if it has"""
+        while not stop.is_set():
+            try:
+                buffer.put(entry, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+        except Exception as e:
+            put((None, e))
+            return
+        finally:
+            # Close an abandoned generator here, on its own thread, so its session is released
+            if stop.is_set() and hasattr(iterable, 'close'):
+                iterable.close()
+        put((done, None))
+
+    worker = threading.Thread(target=produce, name="prefetch", daemon=True)
+    worker.start()
+    try:
+        while True:
+            item, error = buffer.get()
+            if error is not None:
+                raise error
+            if item is done:
+                return
+            yield item
+    finally:
+        stop.set()
+
+
+def fetch_pages_concurrently(fetch_page, page_numbers, max_workers=None):
+    """Fetch numbered pages in parallel and yield each page's items in page order
+
+    Stops after the first page that returns nothing. Pages not yet started
+    are cancelled when the caller stops early.
+    """
+    max_workers = max_workers or getattr(settings, 'FETCH_MAX_WORKERS', DEFAULT_MAX_WORKERS)
+    page_numbers = list(page_numbers)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for start in range(0, len(page_numbers), max_workers):
+            window = page_numbers[start:start + max_workers]
+            futures = [executor.submit(fetch_page, number) for number in window]
+            try:
+                for number, future in zip(window, futures):
+                    try:
+                        items = future.result()
+                    except Exception as e:
+                        logger.error(f"Error fetching page {number}: {e}")
+                        items = []
+                    if not items:
+                        return
+                    yield items
+            finally:
+                for pending in futures:
+                    pending.cancel()
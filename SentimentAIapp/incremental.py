@@ -0,0 +1,109 @@
+import hashlib
+import logging
+from collections import OrderedDict, deque
+
+from django.conf import settings
+
+from .models import SourceWatermark
+from .sentiment_cache import normalize_text
+from .url_cache import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STOP_AFTER_KNOWN = 20
+DEFAULT_MAX_KEYS = 20000
+
+
+def comment_hash(text):
+    return hashlib.sha1(normalize_text(text).encode("utf-8")).hexdigest()[:16]
+
+
+def is_enabled():
+    return getattr(settings, 'INCREMENTAL_ANALYSIS', True)
+
+
+def get_max_keys():
+    return getattr(settings, 'INCREMENTAL_MAX_KEYS', DEFAULT_MAX_KEYS)
+
+
+def new_key_buffer():
+    """Buffer for new comments' keys, capped at the INCREMENTAL_MAX_KEYS that save_watermark keeps"""
+    return deque(maxlen=get_max_keys())
+
+
+def skip_known(comments, known_keys, new_keys, stop_after=None):
+    """Yield only comments not seen before, appending each one's key to ``new_keys``
+
+    Keys are the content hash plus the occurrence number of that text in
+    the stream, so repeated texts like "Nice product" are compared as a
+    multiset rather than collapsing into one. Fetchers read newest first
+    (review listings are requested sorted by most recent), so after
+    ``stop_after`` consecutive known comments everything older has been
+    seen too and fetching stops.
+
+    Occurrence counts are kept for the INCREMENTAL_MAX_KEYS most recently
+    seen texts, the same window the watermark stores keys for, so memory
+    stays bounded however long the stream is.
+    """
+    stop_after = stop_after or getattr(settings, 'INCREMENTAL_STOP_AFTER_KNOWN', DEFAULT_STOP_AFTER_KNOWN)
+    max_keys = get_max_keys()
+    occurrences = OrderedDict()
+    known_run = 0
+    for comment in comments:
+        digest = comment_hash(comment)
+        occurrence = occurrences.pop(digest, 0) + 1
+        occurrences[digest] = occurrence
+        if len(occurrences) > max_keys:
+            occurrences.popitem(last=False)
+        key = f"{digest}:{occurrence}"
+        if key in known_keys:
+            known_run += 1
+            if known_run >= stop_after:
+                return
+            continue
+        known_run = 0
+        new_keys.append(key)
+        yield comment
+
+
+def load_watermark(user, url):
+    return SourceWatermark.objects.filter(user=user, source_key=canonicalize_url(url)).first()
+
+
+def baseline_counts(watermark):
+    if watermark is None:
+        return None
+    return {
+        'POSITIVE': watermark.positive_count,
+        'NEGATIVE': watermark.negative_count,
+        'NEUTRAL': watermark.neutral_count,
+        'purchase_intent': watermark.purchase_intent_count,
+        'total': watermark.total_comments,
+    }
+
+
+def load_known_keys(watermark):
+    return set(watermark.seen_keys) if watermark else set()
+
+
+def save_watermark(user, url, watermark, new_keys, counts):
+    """Record the keys of newly scored comments and the merged totals for the source"""
+    max_keys = get_max_keys()
+    seen = (list(watermark.seen_keys) if watermark else []) + list(new_keys)
+    seen = seen[-max_keys:]
+
+    try:
+        SourceWatermark.objects.update_or_create(
+            user=user,
+            source_key=canonicalize_url(url),
+            defaults={
+                'seen_keys': seen,
+                'positive_count': counts['POSITIVE'],
+                'negative_count': counts['NEGATIVE'],
+                'neutral_count': counts['NEUTRAL'],
+                'purchase_intent_count': counts['purchase_intent'],
+                'total_comments': counts['total'],
+            },
+        )
+    except Exception as e:
+        logger.error(f"Error saving source watermark: {e}")
@@ -0,0 +1,182 @@
+import logging
+import threading
+from collections import defaultdict
+
+import torch
+from django.conf import settings
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 32
+DEFAULT_MAX_LENGTH = 512
+DEFAULT_WINDOW_OVERLAP = 128
+DEFAULT_MAX_WINDOWS = 8
+
+
+def score_to_label(score):
+    """Map a 0-4 star index from the nlptown model to a sentiment label"""
+    return 'POSITIVE' if score > 3 else 'NEGATIVE'
+
+
+def split_windows(ids, size, overlap, max_windows):
+    """Split token ids into windows of at most ``size`` tokens that overlap by ``overlap``
+
+    The last window is aligned to the end of the text. When there are more
+    than ``max_windows``, evenly spaced windows (always including the first
+    and last) are kept.
+    """
+    if len(ids) <= size:
+        return [ids]
+    step = max(1, size - overlap)
+    starts = list(range(0, len(ids) - size + 1, step))
+    if starts[-1] + size < len(ids):
+        starts.append(len(ids) - size)
+    if len(starts) > max_windows:
+        last = len(starts) - 1
+        picks = max(2, max_windows)
+        starts = [starts[round(i * last / (picks - 1))] for i in range(picks)]
+    return [ids[start:start + size] for start in starts]
+
+
+class BatchInferenceEngine:
+    """Scores a whole list of comments with length-sorted, dynamically padded micro-batches
+
+    Comments longer than ``max_length`` tokens are split into overlapping
+    windows instead of being truncated. Windows from all comments share the
+    same batches, identical windows are scored once, and each comment's label
+    comes from its windows' logits averaged by window length.
+    """
+
+    def __init__(self, backend, tokenizer, batch_size=None, num_threads=None, max_length=DEFAULT_MAX_LENGTH,
+                 window_overlap=None, max_windows=None):
+        self.backend = backend
+        self.tokenizer = tokenizer
+        self.batch_size = batch_size or getattr(settings, 'SENTIMENT_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+        self.num_threads = num_threads or getattr(settings, 'SENTIMENT_NUM_THREADS', None)
+        self.max_length = max_length
+        self.window_size = max_length - tokenizer.num_special_tokens_to_add(pair=False)
+        self.window_overlap = min(
+            self.window_size - 1,
+            window_overlap if window_overlap is not None
+            else getattr(settings, 'SENTIMENT_WINDOW_OVERLAP', DEFAULT_WINDOW_OVERLAP),
+        )
+        self.max_windows = max_windows or getattr(settings, 'SENTIMENT_MAX_WINDOWS', DEFAULT_MAX_WINDOWS)
+        self._lock = threading.Lock()
+
+        if self.num_threads:
+            torch.set_num_threads(self.num_threads)
+
+    def _tokenize(self, comments):
+        encoded = self.tokenizer(
+            comments,
+            add_special_tokens=False,
+            truncation=False,
+            padding=False,
+            verbose=False,
+        )
+        return encoded['input_ids']
+
+    def _segment(self, token_ids):
+        """Split each comment into windows, deduplicating identical windows across comments
+
+        Returns ``(windows, parts)``: the unique windows with special tokens
+        added, and for each comment a list of ``(window_index, weight)``.
+        """
+        windows = []
+        window_index = {}
+        parts = []
+        for ids in token_ids:
+            comment_parts = []
+            for window in split_windows(ids, self.window_size, self.window_overlap, self.max_windows):
+                key = tuple(window)
+                if key not in window_index:
+                    window_index[key] = len(windows)
+                    windows.append(self.tokenizer.build_inputs_with_special_tokens(list(window)))
+                comment_parts.append((window_index[key], max(1, len(window))))
+            parts.append(comment_parts)
+        return windows, parts
+
+    @staticmethod
+    def _aggregate(window_logits, comment_parts):
+        """Length-weighted mean of a comment's window logits, as a star index"""
+        if len(comment_parts) == 1:
+            return int(torch.argmax(window_logits[comment_parts[0][0]]))
+        weights = torch.tensor([weight for _, weight in comment_parts], dtype=torch.float32)
+        stacked = torch.stack([window_logits[index].float() for index, _ in comment_parts])
+        return int(torch.argmax((stacked * weights[:, None]).sum(dim=0) / weights.sum()))
+
+    def _forward(self, batch_ids):
+        longest = max(len(ids) for ids in batch_ids)
+        pad_id = self.tokenizer.pad_token_id or 0
+        input_ids = torch.full((len(batch_ids), longest), pad_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(batch_ids), longest), dtype=torch.long)
+        for row, ids in enumerate(batch_ids):
+            input_ids[row, :len(ids)] = torch.tensor(ids, dtype=torch.long)
+            attention_mask[row, :len(ids)] = 1
+
+        metrics.inference_batch_size.observe(len(batch_ids))
+        with metrics.stage_seconds.time(stage='inference'):
+            return self.backend.logits(input_ids, attention_mask)
+
+    def iter_predict_scores(self, comments):
+        """Yield ``(indices, scores)`` after each micro-batch for the comments it completed
+
+        ``indices`` point back into ``comments``. Windows are batched shortest
+        first, so short comments come out early and long ones once their last
+        window is scored.
+        """
+        if not comments:
+            return
+
+        with metrics.stage_seconds.time(stage='tokenize'):
+            token_ids = self._tokenize(list(comments))
+        windows, parts = self._segment(token_ids)
+
+        waiting = defaultdict(list)
+        remaining = []
+        for comment, comment_parts in enumerate(parts):
+            unique_windows = {index for index, _ in comment_parts}
+            for index in unique_windows:
+                waiting[index].append(comment)
+            remaining.append(len(unique_windows))
+
+        window_logits = [None] * len(windows)
+        order = sorted(range(len(windows)), key=lambda i: len(windows[i]))
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            with self._lock:
+                logits = self._forward([windows[i] for i in batch])
+
+            finished = []
+            for row, index in enumerate(batch):
+                window_logits[index] = logits[row]
+                for comment in waiting.pop(index):
+                    remaining[comment] -= 1
+                    if not remaining[comment]:
+                        finished.append(comment)
+            if finished:
+                yield finished, [self._aggregate(window_logits, parts[comment]) for comment in finished]
+
+    def iter_predict(self, comments):
+        """Yield ``(indices, labels)`` for each micro-batch"""
+        for indices, scores in self.iter_predict_scores(comments):
+            yield indices, [score_to_label(score) for score in scores]
+
+    def predict_scores(self, comments, on_batch=None):
+        """Return the predicted star index for each comment, in input order
+
+        ``on_batch`` is called with the number of comments scored after each micro-batch.
+        """
+        scores = [None] * len(comments)
+        for indices, batch_scores in self.iter_predict_scores(comments):
+            for index, score in zip(indices, batch_scores):
+                scores[index] = score
+            if on_batch:
+                on_batch(len(indices))
+        return scores
+
+    def predict(self, comments, on_batch=None):
+        """Return a sentiment label for each comment, in input order"""
+        return [score_to_label(score) for score in self.predict_scores(comments, on_batch=on_batch)]
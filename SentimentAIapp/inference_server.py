@@ -0,0 +1,184 @@
+import json
+import logging
+import os
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+from concurrent.futures import Future
+
+from django.conf import settings
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_WINDOW_MS = 10
+DEFAULT_MAX_BATCH_COMMENTS = 256
+DEFAULT_CLIENT_TIMEOUT = 120
+
+HEADER = struct.Struct("!I")
+
+
+class ConnectionClosed(ConnectionError):
+    """The other end closed the connection, e.g. because the server restarted"""
+
+
+# A stale or refused connection; the request never reached a live server, so it is safe to resend.
+# Timeouts are not included: the server may still be working on the request.
+RETRYABLE_ERRORS = (ConnectionClosed, ConnectionRefusedError, ConnectionResetError, BrokenPipeError, FileNotFoundError)
+
+
+def send_message(sock, payload):
+    body = json.dumps(payload).encode("utf-8")
+    sock.sendall(HEADER.pack(len(body)) + body)
+
+
+def recv_exactly(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise ConnectionClosed("Inference server connection closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def recv_message(sock):
+    (size,) = HEADER.unpack(recv_exactly(sock, HEADER.size))
+    return json.loads(recv_exactly(sock, size).decode("utf-8"))
+
+
+class RequestBatcher:
+    """Merges requests from all connections that arrive within a short window into one engine call"""
+
+    def __init__(self, engine, window_ms=None, max_batch_comments=None):
+        self.engine = engine
+        self.window = (window_ms or getattr(settings, 'SENTIMENT_SERVER_BATCH_WINDOW_MS', DEFAULT_BATCH_WINDOW_MS)) / 1000
+        self.max_batch_comments = max_batch_comments or getattr(
+            settings, 'SENTIMENT_SERVER_MAX_BATCH_COMMENTS', DEFAULT_MAX_BATCH_COMMENTS
+        )
+        self.pending = queue.Queue()
+        self.thread = threading.Thread(target=self.run, name="inference-batcher", daemon=True)
+        self.thread.start()
+
+    def submit(self, comments):
+        future = Future()
+        self.pending.put((comments, future))
+        return future
+
+    def collect(self):
+        requests = [self.pending.get()]
+        size = len(requests[0][0])
+        deadline = time.monotonic() + self.window
+        while size < self.max_batch_comments:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self.pending.get(timeout=remaining)
+            except queue.Empty:
+                break
+            requests.append(request)
+            size += len(request[0])
+        return requests
+
+    def run(self):
+        while True:
+            requests = self.collect()
+            comments = [comment for request_comments, _ in requests for comment in request_comments]
+            try:
+                labels = self.engine.predict(comments)
+            except Exception as e:
+                logger.error(f"Inference batch failed: {e}")
+                for _, future in requests:
+                    future.set_exception(e)
+                continue
+
+            offset = 0
+            for request_comments, future in requests:
+                future.set_result(labels[offset:offset + len(request_comments)])
+                offset += len(request_comments)
+            logger.debug(f"Scored {len(comments)} comments from {len(requests)} requests")
+
+
+class InferenceRequestHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        while True:
+            try:
+                message = recv_message(self.request)
+            except (ConnectionError, OSError):
+                return
+
+            try:
+                labels = self.server.batcher.submit(message['comments']).result()
+                send_message(self.request, {'labels': labels})
+            except Exception as e:
+                send_message(self.request, {'error': str(e)})
+
+
+class InferenceServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, engine, **batcher_options):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        super().__init__(socket_path, InferenceRequestHandler)
+        os.chmod(socket_path, 0o660)
+        self.batcher = RequestBatcher(engine, **batcher_options)
+
+
+class InferenceClient:
+    """Drop-in replacement for BatchInferenceEngine that forwards to an InferenceServer"""
+
+    def __init__(self, socket_path, timeout=None):
+        self.socket_path = socket_path
+        self.timeout = timeout or getattr(settings, 'SENTIMENT_INFERENCE_TIMEOUT', DEFAULT_CLIENT_TIMEOUT)
+        self._local = threading.local()
+
+    def _connection(self):
+        sock = getattr(self._local, 'sock', None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            self._local.sock = sock
+        return sock
+
+    def _reset(self):
+        sock = getattr(self._local, 'sock', None)
+        if sock is not None:
+            sock.close()
+        self._local.sock = None
+
+    def predict(self, comments, on_batch=None):
+        if not comments:
+            return []
+        for attempt in range(2):
+            try:
+                sock = self._connection()
+                with metrics.stage_seconds.time(stage='inference_remote'):
+                    send_message(sock, {'comments': list(comments)})
+                    response = recv_message(sock)
+                break
+            except RETRYABLE_ERRORS:
+                # The server may have restarted; retry once on a fresh connection
+                self._reset()
+                if attempt:
+                    raise
+            except OSError:
+                # Includes timeouts; a late reply would desync the connection, so drop it
+                self._reset()
+                raise
+        if 'error' in response:
+            raise RuntimeError(f"Inference server error: {response['error']}")
+        if on_batch:
+            on_batch(len(comments))
+        return response['labels']
+
+    def iter_predict(self, comments):
+        if comments:
+            yield list(range(len(comments))), self.predict(comments)
@@ -0,0 +1,92 @@
+import re
+import threading
+from bisect import bisect_right
+
+from django.conf import settings
+
+DEFAULT_PURCHASE_PHRASES = [
+    'buy', 'buying', 'bought',
+    'purchase', 'purchased', 'purchasing',
+    'order', 'ordered', 'ordering', 'will order',
+    'cart', 'add to cart', 'checkout',
+    'want to buy', 'where can i get', 'take my money',
+]
+
+# Joins comments so one regex scan covers the batch; \b never matches across it
+SEPARATOR = "\n\x00\n"
+
+
+def trie_pattern(phrases):
+    """Build a prefix-factored alternation so the regex engine never re-tries shared prefixes"""
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node):
+        branches = [
+            (r"\s+" if char == " " else re.escape(char)) + build(child)
+            for char, child in sorted(node.items())
+            if char
+        ]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if '' in node else body
+
+    return build(trie)
+
+
+class PurchaseIntentDetector:
+    """Finds purchase-intent phrases in a batch of comments with one compiled alternation"""
+
+    def __init__(self, phrases):
+        self.phrases = sorted({" ".join(phrase.lower().split()) for phrase in phrases})
+        source = rf"\b{trie_pattern(self.phrases)}\b"
+        self.pattern = re.compile(source)
+        # Only needed when lowercasing changes the text length (e.g. "İ")
+        self.fallback_pattern = re.compile(source, re.IGNORECASE)
+
+    def detect(self, comments):
+        """Return ``(flags, matches)``: a bool and the matched phrases for each comment"""
+        matches = [[] for _ in comments]
+        if not comments:
+            return [], matches
+
+        starts = []
+        offset = 0
+        for comment in comments:
+            starts.append(offset)
+            offset += len(comment) + len(SEPARATOR)
+
+        text = SEPARATOR.join(comments)
+        lowered = text.lower()
+        if len(lowered) == len(text):
+            found = self.pattern.finditer(lowered)
+        else:
+            found = self.fallback_pattern.finditer(text)
+
+        for match in found:
+            index = bisect_right(starts, match.start()) - 1
+            phrase = " ".join(match.group(0).lower().split())
+            if phrase not in matches[index]:
+                matches[index].append(phrase)
+
+        return [bool(phrases) for phrases in matches], matches
+
+
+_detectors = {}
+_detectors_lock = threading.Lock()
+
+
+def get_detector(platform=None):
+    """Detector for a platform, using PURCHASE_INTENT_PHRASES[platform] when configured"""
+    configured = getattr(settings, 'PURCHASE_INTENT_PHRASES', {})
+    phrases = configured.get(platform) or configured.get('default') or DEFAULT_PURCHASE_PHRASES
+    key = tuple(phrases)
+    with _detectors_lock:
+        if key not in _detectors:
+            _detectors[key] = PurchaseIntentDetector(phrases)
+        return _detectors[key]
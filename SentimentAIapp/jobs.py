@@ -0,0 +1,227 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import AnalysisJob
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 2
+DEFAULT_POLL_INTERVAL = 2.0
+DEFAULT_LEASE_SECONDS = 300
+
+_workers = []
+_workers_lock = threading.Lock()
+_wakeup = threading.Event()
+
+
+def get_lease_seconds():
+    return getattr(settings, 'ANALYSIS_JOB_LEASE_SECONDS', DEFAULT_LEASE_SECONDS)
+
+
+def lease_cutoff():
+    """Running jobs last renewed before this have lost their worker"""
+    return timezone.now() - timedelta(seconds=get_lease_seconds())
+
+
+def active_jobs():
+    """Queued jobs, and running jobs whose worker still renews their lease"""
+    return AnalysisJob.objects.filter(
+        Q(status=AnalysisJob.STATUS_QUEUED)
+        | Q(status=AnalysisJob.STATUS_RUNNING, updated_at__gte=lease_cutoff())
+    )
+
+
+def submit_job(user, url, force_refresh=False):
+    """Queue an analysis job, reusing an active job for the same user and URL"""
+    with transaction.atomic():
+        # Lock the user row so concurrent submissions from one user serialize here
+        User.objects.select_for_update().filter(pk=user.pk).first()
+        requeued = requeue_stale_jobs(AnalysisJob.objects.filter(user=user, url=url))
+        job = active_jobs().filter(user=user, url=url).first()
+        if job is None:
+            job = AnalysisJob.objects.create(user=user, url=url, force_refresh=force_refresh)
+            created = True
+        else:
+            created = False
+
+    if (created or requeued) and inline_workers_enabled():
+        ensure_workers()
+        _wakeup.set()
+    return job, created
+
+
+def claim_next_job():
+    """Atomically move the oldest queued job to running and return it"""
+    with transaction.atomic():
+        job = (
+            AnalysisJob.objects.select_for_update(skip_locked=True)
+            .filter(status=AnalysisJob.STATUS_QUEUED)
+            .order_by('created_at')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = AnalysisJob.STATUS_RUNNING
+        job.save(update_fields=['status', 'updated_at'])
+    return job
+
+
+@contextmanager
+def heartbeat(job):
+    """Renew the job's lease from a background thread while the body runs"""
+    stop = threading.Event()
+
+    def renew():
+        try:
+            while not stop.wait(get_lease_seconds() / 3):
+                try:
+                    AnalysisJob.objects.filter(pk=job.pk, status=AnalysisJob.STATUS_RUNNING).update(
+                        updated_at=timezone.now()
+                    )
+                except Exception as e:
+                    logger.error(f"Error renewing lease of analysis job {job.pk}: {e}")
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=renew, name=f"analysis-job-{job.pk}-lease", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run_job(job):
+    from .views import run_url_analysis
+
+    def report_progress(scored, total):
+        # total is the comments fetched so far; None until the stream has started
+        if total is None:
+            AnalysisJob.objects.filter(pk=job.pk).update(progress=scored)
+        else:
+            AnalysisJob.objects.filter(pk=job.pk).update(progress=scored, total_comments=total)
+
+    try:
+        with heartbeat(job):
+            insights = run_url_analysis(
+                job.url,
+                job.user,
+                force_refresh=job.force_refresh,
+                progress_callback=report_progress,
+            )
+        if isinstance(insights, dict) and 'error' in insights:
+            raise ValueError(insights['error'])
+        if insights.get('partial'):
+            AnalysisJob.objects.filter(pk=job.pk).update(
+                status=AnalysisJob.STATUS_FAILED,
+                progress=insights['total_comments'],
+                total_comments=insights['total_comments'],
+                result=insights,
+                error=f"Scoring failed partway; {insights['unscored_comments']} fetched comments were not analyzed",
+                updated_at=timezone.now(),
+            )
+            logger.warning(f"Analysis job {job.pk} only partially finished")
+            return
+
+        AnalysisJob.objects.filter(pk=job.pk).update(
+            status=AnalysisJob.STATUS_DONE,
+            progress=insights['total_comments'],
+            total_comments=insights['total_comments'],
+            result=insights,
+            updated_at=timezone.now(),
+        )
+        logger.info(f"Analysis job {job.pk} finished")
+    except Exception as e:
+        logger.error(f"Analysis job {job.pk} failed: {e}")
+        AnalysisJob.objects.filter(pk=job.pk).update(
+            status=AnalysisJob.STATUS_FAILED,
+            error=str(e),
+            updated_at=timezone.now(),
+        )
+
+
+def requeue_stale_jobs(jobs=None):
+    """Return running jobs whose lease expired, because their worker died, to the queue"""
+    jobs = AnalysisJob.objects.all() if jobs is None else jobs
+    count = jobs.filter(status=AnalysisJob.STATUS_RUNNING, updated_at__lt=lease_cutoff()).update(
+        status=AnalysisJob.STATUS_QUEUED,
+        progress=0,
+        total_comments=0,
+        updated_at=timezone.now(),
+    )
+    if count:
+        logger.info(f"Requeued {count} stale analysis jobs")
+    return count
+
+
+def worker_loop(stop_event=None, poll_interval=None):
+    poll_interval = poll_interval or getattr(settings, 'ANALYSIS_JOB_POLL_INTERVAL', DEFAULT_POLL_INTERVAL)
+    last_sweep = 0.0
+    while stop_event is None or not stop_event.is_set():
+        close_old_connections()
+        try:
+            if time.monotonic() - last_sweep >= get_lease_seconds():
+                last_sweep = time.monotonic()
+                requeue_stale_jobs()
+            job = claim_next_job()
+        except Exception as e:
+            logger.error(f"Error claiming analysis job: {e}")
+            job = None
+
+        if job is None:
+            _wakeup.wait(poll_interval)
+            _wakeup.clear()
+            continue
+
+        run_job(job)
+
+
+def ensure_workers(count=None):
+    """Start the in-process worker threads once per process"""
+    count = count or getattr(settings, 'ANALYSIS_JOB_WORKERS', DEFAULT_WORKERS)
+    with _workers_lock:
+        _workers[:] = [worker for worker in _workers if worker.is_alive()]
+        for index in range(len(_workers), count):
+            worker = threading.Thread(
+                target=worker_loop,
+                name=f"analysis-worker-{index}",
+                daemon=True,
+            )
+            worker.start()
+            _workers.append(worker)
+
+
+def inline_workers_enabled():
+    return getattr(settings, 'ANALYSIS_JOB_INLINE_WORKERS', True)
+
+
+def start_inline_workers():
+    """Start this web process's workers at startup, so jobs left queued or orphaned by a restart resume"""
+    if inline_workers_enabled():
+        ensure_workers()
+        logger.info("Started inline analysis workers")
+
+
+def serialize_job(job):
+    return {
+        'job_id': job.id,
+        'url': job.url,
+        'status': job.status,
+        'progress': job.progress,
+        'total_comments': job.total_comments,
+        'result': job.result,
+        'error': job.error,
+        'created_at': job.created_at.isoformat(),
+        'updated_at': job.updated_at.isoformat(),
+    }
+
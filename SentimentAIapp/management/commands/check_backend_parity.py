@@ -0,0 +1,85 @@
+import json
+import multiprocessing
+import os
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+from SentimentAIapp.backends import BACKENDS
+from SentimentAIapp.inference import score_to_label
+
+DEFAULT_SAMPLES = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'data',
+    'parity_comments.json',
+)
+
+
+def peak_rss_mb():
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def measure_backend(backend_name, comments, repeat=1):
+    """Load and run one backend in a fresh process, so its peak RSS isn't masked by other backends
+
+    Each repeat is a separate ``predict_scores`` call; repeating the samples
+    within one call would be collapsed by window de-duplication.
+    """
+    import django
+
+    django.setup()
+
+    from SentimentAIapp import registry
+
+    rss_before = peak_rss_mb()
+    engine = registry.load_sentiment_engine(backend_name)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        scores = engine.predict_scores(comments)
+    elapsed = time.perf_counter() - started
+    return scores, elapsed, round(peak_rss_mb() - rss_before, 1)
+
+
+class Command(BaseCommand):
+    help = "Compare a sentiment backend's labels and latency against the fp32 torch backend"
+
+    def add_arguments(self, parser):
+        parser.add_argument('backends', nargs='*', default=['quantized', 'onnx'])
+        parser.add_argument('--samples', default=DEFAULT_SAMPLES, help="JSON list of comment strings")
+        parser.add_argument('--repeat', type=int, default=1, help="Score the sample set this many times to lengthen the timing run")
+
+    def score(self, backend_name, comments, repeat):
+        # ru_maxrss never goes down, so each backend gets its own spawned process
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+            return pool.submit(measure_backend, backend_name, comments, repeat).result()
+
+    def handle(self, *args, **options):
+        for name in options['backends']:
+            if name not in BACKENDS:
+                raise CommandError(f"Unknown backend '{name}', expected one of {sorted(BACKENDS)}")
+
+        with open(options['samples'], encoding='utf-8') as f:
+            comments = json.load(f)
+        repeat = max(1, options['repeat'])
+        scored = len(comments) * repeat
+
+        reference, reference_seconds, reference_rss = self.score('torch', comments, repeat)
+        reference_labels = [score_to_label(score) for score in reference]
+        self.stdout.write(
+            f"torch: {scored / reference_seconds:.1f} comments/s, "
+            f"+{reference_rss} MB peak RSS"
+        )
+
+        for name in options['backends']:
+            scores, seconds, rss = self.score(name, comments, repeat)
+            star_agreement = sum(a == b for a, b in zip(scores, reference)) / len(comments)
+            label_agreement = sum(
+                score_to_label(score) == expected for score, expected in zip(scores, reference_labels)
+            ) / len(comments)
+            self.stdout.write(
+                f"{name}: label agreement {label_agreement:.2%}, star agreement {star_agreement:.2%}, "
+                f"{scored / seconds:.1f} comments/s ({reference_seconds / seconds:.2f}x), "
+                f"+{rss} MB peak RSS"
+            )
@@ -0,0 +1,56 @@
+import sys
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from SentimentAIapp.export import EXPORTS, WRITERS, check_format, export_queryset, iter_export
+from SentimentAIapp.queries import QueryParamError
+
+
+class Command(BaseCommand):
+    help = "Export stored comments or analysis history as CSV, NDJSON or Parquet"
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(EXPORTS), help="What to export")
+        parser.add_argument('--format', choices=sorted(WRITERS), default='csv', help="Output format")
+        parser.add_argument('--output', required=True, help="File to write, or - for stdout")
+        parser.add_argument('--user', default=None, help="Only export rows for this username")
+        parser.add_argument('--platform', default=None, help="Only export rows for this platform")
+        parser.add_argument('--start', default=None, help="Earliest created_at date (YYYY-MM-DD)")
+        parser.add_argument('--end', default=None, help="Latest created_at date (YYYY-MM-DD)")
+        parser.add_argument('--sentiment', default=None, help="Only export comments with this sentiment")
+        parser.add_argument('--gzip', action='store_true', help="Gzip CSV/NDJSON output, or use gzip as the Parquet codec")
+        parser.add_argument('--chunk-size', type=int, default=None, help="Rows read and written per chunk")
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"No user named {options['user']}")
+
+        params = {name: options[name] for name in ('platform', 'start', 'end', 'sentiment')}
+        try:
+            check_format(options['format'])
+            queryset = export_queryset(options['kind'], params, user)
+        except (QueryParamError, ImportError) as e:
+            raise CommandError(str(e))
+
+        chunks = iter_export(
+            queryset, options['kind'], options['format'],
+            compress=options['gzip'], chunk_size=options['chunk_size'],
+        )
+        written = 0
+        if options['output'] == '-':
+            for data in chunks:
+                sys.stdout.buffer.write(data)
+                written += len(data)
+            sys.stdout.buffer.flush()
+            return
+
+        with open(options['output'], 'wb') as output:
+            for data in chunks:
+                output.write(data)
+                written += len(data)
+        self.stdout.write(f"Wrote {written} bytes to {options['output']}")
@@ -0,0 +1,43 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+
+from SentimentAIapp.jobs import DEFAULT_WORKERS, requeue_stale_jobs, worker_loop
+
+
+class Command(BaseCommand):
+    help = "Run a pool of background workers that process queued analysis jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+        parser.add_argument('--poll-interval', type=float, default=None)
+        parser.add_argument(
+            '--requeue-stale',
+            action='store_true',
+            help="Return running jobs whose lease expired to the queue before starting (workers also do this periodically)",
+        )
+
+    def handle(self, *args, **options):
+        if options['requeue_stale']:
+            requeue_stale_jobs()
+
+        stop_event = threading.Event()
+        workers = []
+        for index in range(options['workers']):
+            worker = threading.Thread(
+                target=worker_loop,
+                kwargs={'stop_event': stop_event, 'poll_interval': options['poll_interval']},
+                name=f"analysis-worker-{index}",
+                daemon=True,
+            )
+            worker.start()
+            workers.append(worker)
+
+        self.stdout.write(f"Started {len(workers)} analysis workers")
+        try:
+            while any(worker.is_alive() for worker in workers):
+                time.sleep(1)
+        except KeyboardInterrupt:
+            stop_event.set()
+            self.stdout.write("Stopping analysis workers")
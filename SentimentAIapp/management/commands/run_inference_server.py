@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from SentimentAIapp import registry
+from SentimentAIapp.inference_server import InferenceServer
+
+
+class Command(BaseCommand):
+    help = "Serve sentiment inference to all web workers over a Unix socket"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--socket', default=None, help="Socket path (default: SENTIMENT_INFERENCE_SOCKET)")
+        parser.add_argument('--window-ms', type=float, default=None, help="How long to gather requests into one batch")
+        parser.add_argument('--max-batch', type=int, default=None, help="Maximum comments per merged batch")
+
+    def handle(self, *args, **options):
+        socket_path = options['socket'] or getattr(settings, 'SENTIMENT_INFERENCE_SOCKET', None)
+        if not socket_path:
+            raise CommandError("Pass --socket or set SENTIMENT_INFERENCE_SOCKET")
+
+        engine = registry.load_local_engine()
+        server = InferenceServer(
+            socket_path,
+            engine,
+            window_ms=options['window_ms'],
+            max_batch_comments=options['max_batch'],
+        )
+        self.stdout.write(f"Inference server listening on {socket_path}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping inference server")
+        finally:
+            server.server_close()
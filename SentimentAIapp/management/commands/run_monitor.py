@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from SentimentAIapp.monitoring import MonitorScheduler
+
+
+class Command(BaseCommand):
+    help = "Run the local sentiment monitoring scheduler for registered URLs"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help="Maximum concurrent analyses")
+        parser.add_argument('--poll-interval', type=float, default=None, help="Seconds between checks for due sources")
+        parser.add_argument('--once', action='store_true', help="Run everything currently due, then exit")
+
+    def handle(self, *args, **options):
+        scheduler = MonitorScheduler(workers=options['workers'], poll_interval=options['poll_interval'])
+        try:
+            if options['once']:
+                scheduler.run_once()
+            else:
+                self.stdout.write(f"Monitoring with {scheduler.workers} workers, Ctrl+C to stop")
+                scheduler.run_forever()
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping monitor scheduler")
+        finally:
+            scheduler.shutdown()
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from SentimentAIapp.tokens import get_token_backend
+
+
+class Command(BaseCommand):
+    help = "Delete expired authentication tokens"
+
+    def handle(self, *args, **options):
+        removed = get_token_backend().sweep()
+        self.stdout.write(f"Removed {removed} expired tokens")
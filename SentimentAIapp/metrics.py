@@ -0,0 +1,320 @@
+import atexit
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_FLUSH_INTERVAL = 5.0
+
+
+def is_enabled():
+    return getattr(settings, 'METRICS_ENABLED', True)
+
+
+def get_metrics_dir():
+    """Directory shared by all worker processes, or None to keep metrics per process"""
+    return getattr(settings, 'METRICS_DIR', None)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """Base class for a named metric with a fixed set of label names"""
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels):
+        return tuple(labels.get(name, "") for name in self.labelnames)
+
+    def collect(self, series=None):
+        """Exposition text for ``series`` (merged from all workers), or for this process's own series"""
+        if series is None:
+            with self._lock:
+                series = dict(self._series)
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._sample_lines(key, value) for key, value in sorted(series.items()))
+        return "\n".join(line for line in lines if line)
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(key), value] for key, value in self._series.items()]
+
+    def merge(self, current, value):
+        raise NotImplementedError
+
+    def _sample_lines(self, key, value):
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        if not is_enabled():
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+        _mark_dirty()
+
+    def merge(self, current, value):
+        return (current or 0) + value
+
+    def _sample_lines(self, key, value):
+        return f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram(Metric):
+    """Cumulative-bucket histogram; ``observe`` is a bisect and two additions under a lock"""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        if not is_enabled():
+            return
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+        _mark_dirty()
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(key), [list(counts), total]] for key, (counts, total) in self._series.items()]
+
+    def merge(self, current, value):
+        counts, total = value
+        if current is None:
+            return [list(counts), total]
+        if len(counts) != len(current[0]):
+            # Written by a worker running different bucket bounds; not comparable
+            return current
+        return [[a + b for a, b in zip(current[0], counts)], current[1] + total]
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _sample_lines(self, key, value):
+        bucket_counts, total = value
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), bucket_counts):
+            cumulative += count
+            labels = _format_labels(self.labelnames, key, [("le", _format_value(bound))])
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return "\n".join(lines)
+
+
+_registry = []
+_flusher = None
+_flusher_lock = threading.Lock()
+_dirty = threading.Event()
+
+
+def _process_file_name():
+    # The start time keeps a reused pid from overwriting a dead worker's totals
+    return f"metrics-{os.getpid()}-{time.time_ns()}.json"
+
+
+_file_name = _process_file_name()
+
+
+def _mark_dirty():
+    if not get_metrics_dir():
+        return
+    _dirty.set()
+    if _flusher is None:
+        _start_flusher()
+
+
+def _start_flusher():
+    global _flusher
+    with _flusher_lock:
+        if _flusher is not None:
+            return
+        interval = getattr(settings, 'METRICS_FLUSH_INTERVAL', DEFAULT_FLUSH_INTERVAL)
+
+        def run():
+            while True:
+                _dirty.wait()
+                time.sleep(interval)
+                _dirty.clear()
+                flush()
+
+        _flusher = threading.Thread(target=run, name="metrics-flusher", daemon=True)
+        _flusher.start()
+        atexit.register(flush)
+
+
+def _reset_after_fork():
+    """Forked workers start from zero with their own flusher, so nothing the parent recorded is counted twice"""
+    global _flusher, _flusher_lock, _dirty, _file_name
+    _file_name = _process_file_name()
+    _flusher = None
+    _flusher_lock = threading.Lock()
+    _dirty = threading.Event()
+    for metric in _registry:
+        metric._lock = threading.Lock()
+        metric._series = {}
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def flush():
+    """Write this process's series to METRICS_DIR, where render() in any worker merges them"""
+    directory = get_metrics_dir()
+    if not directory:
+        return
+    try:
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, _file_name)
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump({metric.name: metric.snapshot() for metric in _registry}, f)
+        os.replace(f"{path}.tmp", path)
+    except OSError as e:
+        logger.error(f"Error writing metrics to {directory}: {e}")
+
+
+def collect_all(directory):
+    """Series of every metric summed over the files of all workers, past and present"""
+    by_name = {metric.name: metric for metric in _registry}
+    merged = {name: {} for name in by_name}
+    for path in glob.glob(os.path.join(directory, "metrics-*.json")):
+        try:
+            with open(path, encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Skipping unreadable metrics file {path}: {e}")
+            continue
+        for name, series in snapshot.items():
+            metric = by_name.get(name)
+            if metric is None:
+                continue
+            for key, value in series:
+                key = tuple(key)
+                merged[name][key] = metric.merge(merged[name].get(key), value)
+    return merged
+
+
+def render():
+    """Render every registered metric in the Prometheus text exposition format
+
+    With METRICS_DIR set the values are totals over all worker processes;
+    otherwise they are this process's own.
+    """
+    directory = get_metrics_dir()
+    if not directory:
+        return "\n".join(metric.collect() for metric in _registry) + "\n"
+    flush()
+    merged = collect_all(directory)
+    return "\n".join(metric.collect(merged[metric.name]) for metric in _registry) + "\n"
+
+
+fetch_seconds = Histogram(
+    "sentiment_fetch_seconds",
+    "Time spent fetching comments from a platform",
+    ["platform"],
+)
+stage_seconds = Histogram(
+    "sentiment_stage_seconds",
+    "Time spent in a pipeline stage (tokenize, inference per batch, persist, history_write)",
+    ["stage"],
+)
+analysis_seconds = Histogram(
+    "sentiment_analysis_seconds",
+    "End-to-end time of a URL analysis that was not served from the URL cache",
+    ["platform"],
+)
+inference_batch_size = Histogram(
+    "sentiment_inference_batch_size",
+    "Number of comments per inference micro-batch",
+    buckets=BATCH_SIZE_BUCKETS,
+)
+rate_limit_wait_seconds = Histogram(
+    "sentiment_rate_limit_wait_seconds",
+    "Time a platform request waited for a rate limit token and concurrency slot",
+    ["platform"],
+)
+fetch_throttled = Counter(
+    "sentiment_fetch_throttled_total",
+    "Throttling responses (429 or rate-limit errors) received from platforms",
+    ["platform"],
+)
+comments_fetched = Counter(
+    "sentiment_comments_fetched_total",
+    "Comments fetched from platforms",
+    ["platform"],
+)
+comments_persisted = Counter(
+    "sentiment_comments_persisted_total",
+    "Comment rows written to the database",
+)
+sentiment_cache_lookups = Counter(
+    "sentiment_cache_lookups_total",
+    "Per-comment sentiment cache lookups",
+    ["result"],
+)
+comments_scored = Counter(
+    "sentiment_comments_scored_total",
+    "Comments labelled, by the stage that decided them (cache, lexicon, duplicate, model)",
+    ["stage"],
+)
+url_cache_lookups = Counter(
+    "analysis_url_cache_lookups_total",
+    "URL result cache lookups",
+    ["result"],
+)
@@ -26,10 +26,34 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'created_at']),
+            models.Index(fields=['user', 'platform', 'created_at']),
+        ]
 
     def __str__(self):
         return f"{self.platform} - {self.sentiment} by {self.user.username}"
 
+class MonitoredSource(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    url = models.URLField()
+    platform = models.CharField(max_length=50)
+    interval_seconds = models.IntegerField()
+    is_active = models.BooleanField(default=True)
+    next_run_at = models.DateTimeField()
+    last_run_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['is_active', 'next_run_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.url} every {self.interval_seconds}s"
+
 class AnalysisHistory(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     url = models.URLField()
@@ -38,10 +62,88 @@ class AnalysisHistory(models.Model):
     negative_percent = models.FloatField()
     purchase_intent_percent = models.FloatField()
     total_comments = models.IntegerField()
+    trend_score = models.FloatField(null=True, blank=True)
+    top_keywords = models.JSONField(null=True, blank=True)
+    monitor = models.ForeignKey(MonitoredSource, null=True, blank=True, on_delete=models.SET_NULL, related_name='points')
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'created_at']),
+            models.Index(fields=['monitor', 'created_at']),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.platform} - {self.created_at}"
+
+class SentimentCacheEntry(models.Model):
+    key = models.CharField(max_length=64, unique=True)
+    model_id = models.CharField(max_length=100)
+    sentiment = models.CharField(max_length=10)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.model_id} - {self.sentiment}"
+
+class AnalysisJob(models.Model):
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    url = models.URLField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    force_refresh = models.BooleanField(default=False)
+    progress = models.IntegerField(default=0)
+    total_comments = models.IntegerField(default=0)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['user', 'url', 'status']),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.url} - {self.status}"
+
+class AuthToken(models.Model):
+    token_hash = models.CharField(max_length=64, unique=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    username = models.CharField(max_length=150)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.username} - expires {self.expires_at}"
+
+class SourceWatermark(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    source_key = models.CharField(max_length=255)
+    seen_keys = models.JSONField(default=list)
+    positive_count = models.IntegerField(default=0)
+    negative_count = models.IntegerField(default=0)
+    neutral_count = models.IntegerField(default=0)
+    purchase_intent_count = models.IntegerField(default=0)
+    total_comments = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'source_key'], name='unique_user_source_watermark'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.source_key} ({self.total_comments} comments)"
@@ -0,0 +1,131 @@
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .models import MonitoredSource
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 4
+DEFAULT_POLL_INTERVAL = 5.0
+DEFAULT_JITTER = 0.1
+DEFAULT_PLATFORM_CONCURRENCY = 2
+DEFAULT_MIN_INTERVAL = 300
+
+
+def next_run_time(interval_seconds, jitter=None):
+    """Schedule the next run, spread by +/- ``jitter`` of the interval so sources drift apart"""
+    jitter = getattr(settings, 'MONITOR_JITTER', DEFAULT_JITTER) if jitter is None else jitter
+    delay = interval_seconds * (1 + random.uniform(-jitter, jitter))
+    return timezone.now() + timedelta(seconds=max(1, delay))
+
+
+def get_platform_limit(platform):
+    limits = getattr(settings, 'MONITOR_PLATFORM_CONCURRENCY', {})
+    return limits.get(platform, DEFAULT_PLATFORM_CONCURRENCY)
+
+
+class MonitorScheduler:
+    """Runs due MonitoredSource entries on a bounded pool with per-platform limits"""
+
+    def __init__(self, workers=None, poll_interval=None):
+        self.workers = workers or getattr(settings, 'MONITOR_WORKERS', DEFAULT_WORKERS)
+        self.poll_interval = poll_interval or getattr(settings, 'MONITOR_POLL_INTERVAL', DEFAULT_POLL_INTERVAL)
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="monitor")
+        self.in_flight = {}
+        self._lock = threading.Lock()
+        self.stop_event = threading.Event()
+
+    def platform_load(self, platform):
+        return sum(1 for running in self.in_flight.values() if running == platform)
+
+    def claim(self, source):
+        """Move next_run_at forward; returns False if another scheduler got there first"""
+        claimed = MonitoredSource.objects.filter(
+            pk=source.pk,
+            next_run_at=source.next_run_at,
+        ).update(next_run_at=next_run_time(source.interval_seconds))
+        return claimed == 1
+
+    def dispatch_due(self):
+        """Submit every due source that fits under the pool and platform limits"""
+        due = MonitoredSource.objects.filter(
+            is_active=True,
+            next_run_at__lte=timezone.now(),
+        ).select_related('user').order_by('next_run_at')
+
+        dispatched = 0
+        for source in due:
+            with self._lock:
+                if len(self.in_flight) >= self.workers:
+                    break
+                if source.pk in self.in_flight:
+                    continue
+                if self.platform_load(source.platform) >= get_platform_limit(source.platform):
+                    continue
+                if not self.claim(source):
+                    continue
+                self.in_flight[source.pk] = source.platform
+            self.executor.submit(self.run_source, source)
+            dispatched += 1
+        return dispatched
+
+    def run_source(self, source):
+        from .views import run_url_analysis
+
+        close_old_connections()
+        error = None
+        try:
+            result = run_url_analysis(source.url, source.user, monitor=source)
+            if isinstance(result, dict) and 'error' in result:
+                error = result['error']
+            else:
+                logger.info(
+                    f"Monitor {source.pk} run finished: {result.get('new_comments', result['total_comments'])} "
+                    f"new comments, {result['positive_percent']}% positive"
+                )
+        except Exception as e:
+            error = str(e)
+
+        if error:
+            logger.error(f"Monitor {source.pk} run failed: {error}")
+        try:
+            MonitoredSource.objects.filter(pk=source.pk).update(last_run_at=timezone.now(), last_error=error)
+        except Exception as e:
+            logger.error(f"Error recording monitor {source.pk} run: {e}")
+        finally:
+            # Always free the slot, or the source would never be dispatched again
+            with self._lock:
+                self.in_flight.pop(source.pk, None)
+            close_old_connections()
+
+    def run_forever(self):
+        logger.info(f"Monitor scheduler started with {self.workers} workers")
+        while not self.stop_event.is_set():
+            try:
+                self.dispatch_due()
+            except Exception as e:
+                logger.error(f"Monitor scheduler error: {e}")
+            close_old_connections()
+            self.stop_event.wait(self.poll_interval)
+
+    def run_once(self):
+        """Run everything currently due, waiting for platform slots, then return"""
+        while True:
+            dispatched = self.dispatch_due()
+            with self._lock:
+                busy = bool(self.in_flight)
+            if not dispatched and not busy:
+                break
+            time.sleep(0.5)
+
+    def shutdown(self):
+        self.stop_event.set()
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,65 @@
+import logging
+
+from django.conf import settings
+from django.db import transaction
+
+from . import metrics
+from .models import Comment
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+def _save_chunk(chunk):
+    """Insert one chunk, falling back to row-by-row inserts if the bulk insert fails"""
+    try:
+        with transaction.atomic():
+            Comment.objects.bulk_create(chunk)
+        return len(chunk)
+    except Exception as chunk_error:
+        logger.error(f"Bulk comment insert failed, retrying row by row: {chunk_error}")
+
+    saved = 0
+    for comment in chunk:
+        try:
+            with transaction.atomic():
+                comment.save()
+            saved += 1
+        except Exception as db_error:
+            logger.error(f"Database save error: {db_error}")
+    return saved
+
+
+def save_analysis(comments, history, chunk_size=None):
+    """Write Comment rows and the AnalysisHistory row in a single transaction
+
+    Each chunk and the history row run in their own savepoint, so a bad row is
+    logged and skipped instead of rolling back the whole analysis. Streaming
+    analyses call this once per chunk and pass ``history`` with the last
+    chunk only, so earlier chunks are already committed by then.
+    Returns the number of comments saved.
+    """
+    chunk_size = chunk_size or getattr(settings, 'COMMENT_BULK_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+    saved = 0
+
+    try:
+        with transaction.atomic():
+            with metrics.stage_seconds.time(stage='persist'):
+                for start in range(0, len(comments), chunk_size):
+                    saved += _save_chunk(comments[start:start + chunk_size])
+
+            if history is not None:
+                try:
+                    with transaction.atomic(), metrics.stage_seconds.time(stage='history_write'):
+                        history.save()
+                    logger.info("Analysis history saved successfully")
+                except Exception as e:
+                    logger.error(f"Error saving analysis history: {e}")
+    except Exception as e:
+        logger.error(f"Error persisting analysis: {e}")
+        return 0
+
+    metrics.comments_persisted.inc(saved)
+    logger.info(f"Saved {saved}/{len(comments)} comments")
+    return saved
@@ -0,0 +1,83 @@
+import re
+from urllib.parse import urlsplit, urlunsplit
+
+TWITTER = "Twitter"
+INSTAGRAM = "Instagram"
+YOUTUBE = "YouTube"
+ECOMMERCE = "E-commerce"
+
+INSTAGRAM_SHORTCODE_RE = re.compile(r"(?:p|reel)/([^/?]+)")
+YOUTUBE_WATCH_RE = re.compile(r"v=([^&]+)")
+YOUTUBE_SHORT_RE = re.compile(r"youtu\.be/([^/?]+)")
+AMAZON_ASIN_RE = re.compile(r"/(?:dp|gp/product|product-reviews)/([A-Z0-9]{10})")
+FLIPKART_PID_RE = re.compile(r"[?&]pid=([A-Z0-9]+)")
+FLIPKART_ITEM_RE = re.compile(r"/(?:p|product-reviews)/(itm[0-9a-zA-Z]+)")
+
+
+def detect_platform(url):
+    if "twitter.com" in url:
+        return TWITTER
+    if "instagram.com" in url:
+        return INSTAGRAM
+    if "youtube.com" in url or "youtu.be" in url:
+        return YOUTUBE
+    if "amazon." in url or "flipkart." in url:
+        return ECOMMERCE
+    return None
+
+
+def tweet_id(url):
+    return url.split("/")[-1].split("?")[0] or None
+
+
+def instagram_shortcode(url):
+    match = INSTAGRAM_SHORTCODE_RE.search(url)
+    return match.group(1) if match else None
+
+
+def youtube_video_id(url):
+    match = YOUTUBE_WATCH_RE.search(url) or YOUTUBE_SHORT_RE.search(url)
+    return match.group(1) if match else None
+
+
+def ecommerce_product_id(url):
+    if "amazon." in url:
+        match = AMAZON_ASIN_RE.search(url)
+        return f"amazon:{match.group(1)}" if match else None
+    match = FLIPKART_PID_RE.search(url)
+    return f"flipkart:{match.group(1)}" if match else None
+
+
+def ecommerce_reviews_url(url):
+    """The product's paginated review listing, or None if the URL doesn't identify a product
+
+    Product pages (``/dp/<ASIN>``, ``/p/<item>``) show a few top reviews and
+    ignore page parameters, so only the review listing can be paged.
+    """
+    parts = urlsplit(url)
+    if "amazon." in url:
+        match = AMAZON_ASIN_RE.search(parts.path)
+        if not match:
+            return None
+        path = f"{parts.path[:match.start()]}/product-reviews/{match.group(1)}/"
+        return urlunsplit(parts._replace(path=path, query="", fragment=""))
+    match = FLIPKART_ITEM_RE.search(parts.path)
+    pid = FLIPKART_PID_RE.search(url)
+    if not match or not pid:
+        return None
+    path = f"{parts.path[:match.start()]}/product-reviews/{match.group(1)}"
+    return urlunsplit(parts._replace(path=path, query=f"pid={pid.group(1)}", fragment=""))
+
+
+def source_id(url):
+    """Platform-specific id of the post, video or product a URL points to"""
+    platform = detect_platform(url)
+    if platform == TWITTER:
+        return tweet_id(url)
+    if platform == INSTAGRAM:
+        return instagram_shortcode(url)
+    if platform == YOUTUBE:
+        return youtube_video_id(url)
+    if platform == ECOMMERCE:
+        return ecommerce_product_id(url)
+    return None
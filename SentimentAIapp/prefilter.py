@@ -0,0 +1,116 @@
+import re
+import unicodedata
+
+from django.conf import settings
+
+from .sentiment_cache import normalize_text
+
+DEFAULT_CONFIDENCE_THRESHOLD = 0.9
+DEFAULT_MAX_WORDS = 3
+
+# The model only labels its 5-star class POSITIVE (see inference.score_to_label), so positive
+# terms are limited to ones it rates 5 stars on their own; milder praise such as "good",
+# "nice" or 👍 usually lands on 4 stars and is left to the model.
+POSITIVE_EMOJI = set("😍🥰😻🤩❤💕💖💗💞💯🔥")
+NEGATIVE_EMOJI = set("😠😡🤬😞😒😔😟😢😩😫🤮🤢👎💩😤😾💔🙄")
+
+POSITIVE_WORDS = {
+    'love', 'loved', 'amazing', 'excellent', 'best', 'perfect', 'fantastic', 'awesome',
+    'wonderful', 'brilliant', 'superb', 'masterpiece',
+}
+NEGATIVE_WORDS = {
+    'bad', 'worst', 'terrible', 'awful', 'horrible', 'hate', 'hated', 'poor', 'boring', 'useless',
+    'scam', 'fake', 'waste', 'broken', 'disappointing', 'disappointed', 'trash', 'garbage', 'pathetic',
+    'cringe', 'sucks', 'refund',
+}
+# Words that neither carry sentiment nor make a short comment ambiguous
+FILLER_WORDS = {
+    'a', 'an', 'the', 'it', 'its', 'this', 'that', 'is', 'so', 'very', 'really', 'too', 'such',
+    'video', 'product', 'item', 'content', 'one', 'just', 'and', 'i', 'my', 'you', 'your',
+}
+# Any of these hands the comment to the model, since the lexicon cannot handle negation
+NEGATIONS = {'not', 'no', 'never', 'nothing', 'dont', "don't", 'isnt', "isn't", 'wasnt', "wasn't", 'but'}
+
+_word_re = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)?")
+_repeat_re = re.compile(r"(.)\1{2,}")
+
+
+def near_duplicate_key(text):
+    """Normalized text with punctuation dropped and character runs shortened
+
+    "Great video!!!" and "great   video" share a key, as do "GREAT VIDEOOOO" and "great videooo".
+    """
+    text = normalize_text(text)
+    text = "".join(" " if unicodedata.category(char).startswith("P") else char for char in text)
+    text = _repeat_re.sub(r"\1\1", text)
+    return " ".join(text.split())
+
+
+def lexicon_score(text, max_words=DEFAULT_MAX_WORDS):
+    """Score an emoji-only or very short comment: returns ``(label, confidence)``
+
+    ``label`` is None when the comment is too long, negated or has no known
+    sentiment words or emoji. Confidence is the share of polar tokens that
+    agree, times the share of non-filler words and emoji that are polar.
+    """
+    positive = sum(1 for char in text if char in POSITIVE_EMOJI)
+    negative = sum(1 for char in text if char in NEGATIVE_EMOJI)
+    other_emoji = sum(
+        1 for char in text
+        if unicodedata.category(char) == "So" and char not in POSITIVE_EMOJI and char not in NEGATIVE_EMOJI
+    )
+
+    words = [word for word in _word_re.findall(text.lower()) if word not in FILLER_WORDS]
+    if len(words) > max_words or any(word in NEGATIONS for word in words):
+        return None, 0.0
+    positive += sum(1 for word in words if word in POSITIVE_WORDS)
+    negative += sum(1 for word in words if word in NEGATIVE_WORDS)
+
+    polar = positive + negative
+    if not polar:
+        return None, 0.0
+    neutral = other_emoji + sum(1 for word in words if word not in POSITIVE_WORDS and word not in NEGATIVE_WORDS)
+    confidence = (max(positive, negative) / polar) * (polar / (polar + neutral))
+    return ('POSITIVE' if positive > negative else 'NEGATIVE'), confidence
+
+
+class PreFilter:
+    """Resolves trivial comments and near-duplicates before they reach the model"""
+
+    def __init__(self, threshold=None, max_words=None):
+        self.threshold = threshold if threshold is not None else getattr(
+            settings, 'PREFILTER_CONFIDENCE_THRESHOLD', DEFAULT_CONFIDENCE_THRESHOLD
+        )
+        self.max_words = max_words or getattr(settings, 'PREFILTER_MAX_WORDS', DEFAULT_MAX_WORDS)
+
+    def split(self, comments):
+        """Return ``(resolved, groups, counts)``
+
+        ``resolved`` maps comment index to a label decided by the lexicon.
+        ``groups`` maps each comment that still needs the model to the indices
+        of its near-duplicates, which take the same label. ``counts`` has the
+        number of comments decided by ``lexicon``, ``duplicate`` and ``model``.
+        """
+        by_key = {}
+        for index, comment in enumerate(comments):
+            by_key.setdefault(near_duplicate_key(comment), []).append(index)
+
+        resolved = {}
+        groups = {}
+        counts = {'lexicon': 0, 'duplicate': 0, 'model': 0}
+        for members in by_key.values():
+            representative, duplicates = members[0], members[1:]
+            label, confidence = lexicon_score(comments[representative], self.max_words)
+            if label and confidence >= self.threshold:
+                for index in members:
+                    resolved[index] = label
+                counts['lexicon'] += 1
+            else:
+                groups[representative] = duplicates
+                counts['model'] += 1
+            counts['duplicate'] += len(duplicates)
+        return resolved, groups, counts
+
+
+def is_enabled():
+    return getattr(settings, 'PREFILTER_ENABLED', True)
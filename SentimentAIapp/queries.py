@@ -0,0 +1,124 @@
+import base64
+from datetime import datetime, time as dt_time, timedelta
+
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+DEFAULT_PAGE_SIZE = 10
+MAX_PAGE_SIZE = 200
+DEFAULT_TREND_DAYS = 30
+
+
+class QueryParamError(ValueError):
+    pass
+
+
+def encode_cursor(row):
+    raw = f"{row.created_at.isoformat()}|{row.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        created_at, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        created_at, row_id = parse_datetime(created_at), int(row_id)
+    except Exception:
+        raise QueryParamError("Invalid cursor")
+    if created_at is None:
+        raise QueryParamError("Invalid cursor")
+    return created_at, row_id
+
+
+def parse_bound(value, end_of_day=False):
+    """Accept an ISO datetime or a date; bare dates cover the whole day"""
+    if not value:
+        return None
+    try:
+        # Well-formed but impossible dates such as 2024-02-30 raise ValueError
+        parsed = parse_datetime(value)
+        day = parse_date(value) if parsed is None else None
+    except ValueError:
+        raise QueryParamError(f"Invalid date: {value}")
+    if parsed is None:
+        if day is None:
+            raise QueryParamError(f"Invalid date: {value}")
+        parsed = datetime.combine(day, dt_time.max if end_of_day else dt_time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def parse_limit(value):
+    if not value:
+        return DEFAULT_PAGE_SIZE
+    try:
+        limit = int(value)
+    except ValueError:
+        raise QueryParamError("limit must be an integer")
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def apply_filters(queryset, params, sentiment=False):
+    """Filter by platform, date range (start/end) and optionally sentiment"""
+    platform = params.get('platform')
+    if platform:
+        queryset = queryset.filter(platform=platform)
+    start = parse_bound(params.get('start'))
+    if start:
+        queryset = queryset.filter(created_at__gte=start)
+    end = parse_bound(params.get('end'), end_of_day=True)
+    if end:
+        queryset = queryset.filter(created_at__lte=end)
+    if sentiment and params.get('sentiment'):
+        queryset = queryset.filter(sentiment=params['sentiment'].upper())
+    return queryset
+
+
+def keyset_page(queryset, params):
+    """Newest-first page after ``cursor``, using (created_at, id) as the key
+
+    Returns ``(rows, next_cursor)``; the query stays an index range scan
+    however deep the client pages.
+    """
+    limit = parse_limit(params.get('limit'))
+    cursor = params.get('cursor')
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=row_id)
+        )
+    rows = list(queryset.order_by('-created_at', '-id')[:limit + 1])
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def daily_sentiment_trend(queryset, params):
+    """Per-day, per-platform sentiment and purchase-intent counts, aggregated in SQL"""
+    if not params.get('start'):
+        queryset = queryset.filter(created_at__gte=timezone.now() - timedelta(days=DEFAULT_TREND_DAYS))
+    rows = (
+        queryset
+        .annotate(day=TruncDate('created_at'))
+        .values('day', 'platform')
+        .annotate(
+            total=Count('id'),
+            positive=Count('id', filter=Q(sentiment='POSITIVE')),
+            negative=Count('id', filter=Q(sentiment='NEGATIVE')),
+            purchase_intent=Count('id', filter=Q(purchase_intent=True)),
+        )
+        .order_by('day', 'platform')
+    )
+    return [
+        {
+            'day': row['day'].isoformat(),
+            'platform': row['platform'],
+            'total': row['total'],
+            'positive': row['positive'],
+            'negative': row['negative'],
+            'purchase_intent': row['purchase_intent'],
+            'positive_percent': round(row['positive'] / row['total'] * 100, 2) if row['total'] else 0,
+        }
+        for row in rows
+    ]
@@ -0,0 +1,296 @@
+import email.utils
+import hashlib
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+from . import metrics, platforms
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WAIT = 120
+DEFAULT_THROTTLE_RETRIES = 5
+DEFAULT_THROTTLE_BACKOFF = 2.0
+DEFAULT_DECREASE_FACTOR = 0.5
+
+# rate is requests/second, burst the bucket size, max_concurrency the most
+# requests in flight; credential_* limit each API key, account or host.
+# Twitter's search allows 450 requests per 15 minutes per app and 180 per user.
+DEFAULT_RATE_LIMITS = {
+    platforms.TWITTER: {'rate': 0.5, 'burst': 5, 'max_concurrency': 2, 'credential_rate': 0.2, 'credential_burst': 5},
+    platforms.INSTAGRAM: {'rate': 0.5, 'burst': 5, 'max_concurrency': 1, 'credential_rate': 0.5, 'credential_burst': 5},
+    platforms.YOUTUBE: {'rate': 10, 'burst': 20, 'max_concurrency': 8, 'credential_rate': 5, 'credential_burst': 10},
+    platforms.ECOMMERCE: {'rate': 4, 'burst': 8, 'max_concurrency': 4, 'credential_rate': 2, 'credential_burst': 4},
+}
+FALLBACK_RATE_LIMIT = {'rate': 2, 'burst': 4, 'max_concurrency': 4, 'credential_rate': 2, 'credential_burst': 4}
+
+
+class Throttled(Exception):
+    """Raised from a limited call when the platform says to slow down"""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RateLimitTimeout(Exception):
+    """A call waited in the queue longer than ``FETCH_RATE_LIMIT_MAX_WAIT``"""
+
+
+class TokenBucket:
+    """Allows ``rate`` calls per second on average and bursts of up to ``capacity``
+
+    Each ``reserve`` takes a token, letting the balance go negative, and
+    returns how long the caller must sleep for it. Callers therefore queue in
+    arrival order instead of polling.
+    """
+
+    def __init__(self, rate, capacity, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = float(capacity)
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def _wait(self, now):
+        return max(0.0, self.updated - now) + max(0.0, -self.tokens) / self.rate
+
+    def reserve(self, timeout=None):
+        """Take a token and return the seconds to sleep before using it
+
+        Raises RateLimitTimeout, without taking the token, if that would be
+        longer than ``timeout``.
+        """
+        with self.lock:
+            now = self.clock()
+            self._refill(now)
+            self.tokens -= 1
+            wait = self._wait(now)
+            if timeout is not None and wait > timeout:
+                self.tokens += 1
+                raise RateLimitTimeout(f"Next request slot is {wait:.1f}s away")
+            return wait
+
+    def pause(self, seconds):
+        """Hand out no tokens for ``seconds``, and start empty afterwards"""
+        with self.lock:
+            now = self.clock()
+            self._refill(now)
+            self.tokens = min(self.tokens, 0.0)
+            self.updated = max(self.updated, now + seconds)
+
+
+class AdaptiveConcurrency:
+    """Caps in-flight calls with AIMD: halve the cap on throttling, add about one per cap's worth of successes"""
+
+    def __init__(self, max_limit, min_limit=1, decrease_factor=DEFAULT_DECREASE_FACTOR):
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.decrease_factor = decrease_factor
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        self.condition = threading.Condition()
+
+    def acquire(self, timeout=None):
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.in_flight < int(self.limit), timeout):
+                raise RateLimitTimeout(f"All {int(self.limit)} request slots stayed busy")
+            self.in_flight += 1
+
+    def release(self, throttled=None):
+        """``throttled`` is True to back off, False to grow the cap, None (an unrelated error) to leave it"""
+        with self.condition:
+            self.in_flight -= 1
+            if throttled:
+                self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+            elif throttled is not None:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self.condition.notify_all()
+
+
+class RateLimiter:
+    """Token bucket plus adaptive concurrency for one platform or one credential"""
+
+    def __init__(self, name, rate, burst, max_concurrency):
+        self.name = name
+        self.bucket = TokenBucket(rate, burst)
+        self.concurrency = AdaptiveConcurrency(max_concurrency)
+
+    def acquire(self, deadline):
+        self.concurrency.acquire(remaining(deadline))
+        try:
+            wait(self.bucket, deadline)
+        except RateLimitTimeout:
+            self.concurrency.release()
+            raise
+
+    def release(self, throttled=None):
+        self.concurrency.release(throttled)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def remaining(deadline):
+    return max(0.0, deadline - time.monotonic())
+
+
+def wait(bucket, deadline):
+    delay = bucket.reserve(remaining(deadline))
+    if delay > 0:
+        time.sleep(delay)
+
+
+def get_limits(platform):
+    limits = dict(DEFAULT_RATE_LIMITS.get(platform, FALLBACK_RATE_LIMIT))
+    limits.update(getattr(settings, 'FETCH_RATE_LIMITS', {}).get(platform, {}))
+    return limits
+
+
+def credential_id(credential):
+    """Short stable id for a credential, so keys never end up in logs"""
+    return hashlib.sha256(str(credential).encode('utf-8')).hexdigest()[:12]
+
+
+def get_limiter(platform, credential=None):
+    """Process-wide limiter for a platform, or for one credential on it"""
+    key = (platform, credential_id(credential) if credential else None)
+    limiter = _limiters.get(key)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(key)
+            if limiter is None:
+                limits = get_limits(platform)
+                if credential:
+                    limiter = RateLimiter(
+                        f"{platform}/{key[1]}",
+                        limits['credential_rate'],
+                        limits['credential_burst'],
+                        limits['max_concurrency'],
+                    )
+                else:
+                    limiter = RateLimiter(platform, limits['rate'], limits['burst'], limits['max_concurrency'])
+                _limiters[key] = limiter
+    return limiter
+
+
+def limiters_for(platform, credential=None):
+    # Always platform first, then credential, so concurrent callers can't deadlock on each other's slots
+    limiters = [get_limiter(platform)]
+    if credential:
+        limiters.append(get_limiter(platform, credential))
+    return limiters
+
+
+def get_deadline():
+    return time.monotonic() + getattr(settings, 'FETCH_RATE_LIMIT_MAX_WAIT', DEFAULT_MAX_WAIT)
+
+
+def throttled(platform, credential=None, retry_after=None, attempt=1):
+    """Pause the platform's and credential's buckets after a throttling response; returns the pause"""
+    backoff = getattr(settings, 'FETCH_THROTTLE_BACKOFF', DEFAULT_THROTTLE_BACKOFF)
+    delay = retry_after if retry_after is not None else backoff * 2 ** (attempt - 1)
+    for limiter in limiters_for(platform, credential):
+        limiter.bucket.pause(delay)
+    metrics.fetch_throttled.inc(platform=platform)
+    logger.warning(f"{platform} throttled requests, pausing {delay:.1f}s")
+    return delay
+
+
+def acquire_token(platform, credential=None):
+    """Wait for a request token without holding a concurrency slot, for clients that pace their own calls"""
+    deadline = get_deadline()
+    started = time.monotonic()
+    for limiter in limiters_for(platform, credential):
+        wait(limiter.bucket, deadline)
+    metrics.rate_limit_wait_seconds.observe(time.monotonic() - started, platform=platform)
+
+
+def instaloader_rate_controller(credential=None):
+    """Instaloader ``rate_controller`` class that also paces queries by the shared Instagram limits"""
+    import instaloader
+
+    class SharedRateController(instaloader.RateController):
+        def wait_before_query(self, query_type):
+            super().wait_before_query(query_type)
+            acquire_token(platforms.INSTAGRAM, credential)
+
+        def handle_429(self, query_type):
+            throttled(platforms.INSTAGRAM, credential)
+            super().handle_429(query_type)
+
+    return SharedRateController
+
+
+def call(platform, credential, func, *args, **kwargs):
+    """Run ``func`` within the platform's and credential's limits
+
+    Callers over the budget wait in line. When ``func`` raises Throttled, the
+    call backs off and retries, up to ``FETCH_THROTTLE_RETRIES`` times and
+    ``FETCH_RATE_LIMIT_MAX_WAIT`` seconds in total.
+    """
+    limiters = limiters_for(platform, credential)
+    deadline = get_deadline()
+    retries = getattr(settings, 'FETCH_THROTTLE_RETRIES', DEFAULT_THROTTLE_RETRIES)
+    attempt = 0
+    while True:
+        acquired = []
+        outcome = None
+        started = time.monotonic()
+        try:
+            for limiter in limiters:
+                limiter.acquire(deadline)
+                acquired.append(limiter)
+            metrics.rate_limit_wait_seconds.observe(time.monotonic() - started, platform=platform)
+            result = func(*args, **kwargs)
+            outcome = False
+        except Throttled as e:
+            error = e
+            outcome = True
+        finally:
+            for limiter in acquired:
+                limiter.release(outcome)
+        if not outcome:
+            return result
+
+        attempt += 1
+        if attempt > retries:
+            raise error
+        throttled(platform, credential, error.retry_after, attempt)
+
+
+def retry_after(headers):
+    """Seconds to wait according to Retry-After or an x-rate-limit-reset epoch, or None"""
+    value = headers.get('Retry-After')
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+    reset = headers.get('x-rate-limit-reset') or headers.get('x-ratelimit-reset')
+    if reset:
+        try:
+            return max(0.0, float(reset) - time.time())
+        except ValueError:
+            return None
+    return None
+
+
+def is_throttled(response):
+    """429, or the 403 rate-limit errors Google APIs return"""
+    if response.status_code == 429:
+        return True
+    return response.status_code == 403 and 'ratelimitexceeded' in response.text.lower()
@@ -0,0 +1,155 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+BERT_MODEL_NAME = "nlptown/bert-base-multilingual-uncased-sentiment"
+DEFAULT_BACKEND = 'torch'
+DEFAULT_SPACY_MODEL = "en_core_web_sm"
+# spaCy components that enrichment doesn't use (it needs ner, and the tagger and parser for noun chunks)
+UNUSED_SPACY_PIPES = ('lemmatizer', 'textcat', 'senter')
+
+
+class LazyResource:
+    """A model or API client that is built on first use and then shared"""
+
+    def __init__(self, name, loader):
+        self.name = name
+        self.loader = loader
+        self.value = None
+        self.loaded = False
+        self.load_seconds = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if not self.loaded:
+            with self._lock:
+                if not self.loaded:
+                    started = time.perf_counter()
+                    self.value = self.loader()
+                    self.load_seconds = round(time.perf_counter() - started, 3)
+                    self.loaded = True
+                    logger.info(f"Loaded {self.name} in {self.load_seconds}s")
+        return self.value
+
+
+_resources = {}
+
+
+def register(name, loader):
+    _resources[name] = LazyResource(name, loader)
+
+
+def get(name):
+    return _resources[name].get()
+
+
+def preload(names=None):
+    """Load resources up front, e.g. in the gunicorn master before workers fork"""
+    for name in names or getattr(settings, 'SENTIMENT_PRELOAD_RESOURCES', ['sentiment_engine']):
+        try:
+            get(name)
+        except Exception as e:
+            logger.error(f"Error preloading {name}: {e}")
+
+
+def load_timings():
+    return {
+        name: resource.load_seconds
+        for name, resource in _resources.items()
+        if resource.loaded
+    }
+
+
+def get_backend_name():
+    return getattr(settings, 'SENTIMENT_BACKEND', DEFAULT_BACKEND)
+
+
+def model_id():
+    """Identifies the model, backend and scoring scheme, so cached labels from one never serve another"""
+    return f"{BERT_MODEL_NAME}:{get_backend_name()}:windowed"
+
+
+def load_bert_model():
+    from transformers import BertForSequenceClassification
+
+    return BertForSequenceClassification.from_pretrained(BERT_MODEL_NAME)
+
+
+def load_sentiment_engine(backend_name=None):
+    socket_path = getattr(settings, 'SENTIMENT_INFERENCE_SOCKET', None)
+    if socket_path and backend_name is None:
+        from .inference_server import InferenceClient
+
+        return InferenceClient(socket_path)
+    return load_local_engine(backend_name)
+
+
+def load_local_engine(backend_name=None, num_threads=None):
+    from transformers import BertTokenizer
+    from .backends import create_backend
+    from .inference import BatchInferenceEngine
+
+    backend = create_backend(load_bert_model, backend_name)
+    bert_tokenizer = BertTokenizer.from_pretrained(BERT_MODEL_NAME)
+    return BatchInferenceEngine(backend, bert_tokenizer, num_threads=num_threads)
+
+
+def load_scoring_pool():
+    from .batch import create_scoring_pool
+
+    return create_scoring_pool()
+
+
+def load_nlp():
+    try:
+        import spacy
+
+        nlp = spacy.load(getattr(settings, 'SPACY_MODEL', DEFAULT_SPACY_MODEL))
+        nlp.select_pipes(disable=[name for name in UNUSED_SPACY_PIPES if name in nlp.pipe_names])
+        return nlp
+    except Exception as e:
+        logger.error(f"Error loading spacy: {e}")
+        return None
+
+
+def load_instaloader():
+    import instaloader
+
+    from .ratelimit import instaloader_rate_controller
+
+    username = getattr(settings, 'INSTAGRAM_USERNAME', "")
+    password = getattr(settings, 'INSTAGRAM_PASSWORD', "")
+    # Instaloader waits out 429s itself; the shared controller makes other fetches pause too
+    loader = instaloader.Instaloader(rate_controller=instaloader_rate_controller(username))
+    if username:
+        try:
+            loader.load_session_from_file(username)
+        except FileNotFoundError:
+            loader.login(username, password)
+            loader.save_session_to_file()
+    return loader
+
+
+def load_twitter_api():
+    import tweepy
+
+    auth = tweepy.OAuthHandler(
+        getattr(settings, 'TWITTER_API_KEY', ""),
+        getattr(settings, 'TWITTER_API_SECRET', ""),
+    )
+    auth.set_access_token(
+        getattr(settings, 'TWITTER_ACCESS_TOKEN', ""),
+        getattr(settings, 'TWITTER_ACCESS_SECRET', ""),
+    )
+    return tweepy.API(auth)
+
+
+register('sentiment_engine', load_sentiment_engine)
+register('nlp', load_nlp)
+register('scoring_pool', load_scoring_pool)
+register('instaloader', load_instaloader)
+register('twitter_api', load_twitter_api)
@@ -0,0 +1,124 @@
+import hashlib
+import logging
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .models import SentimentCacheEntry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 50000
+
+_whitespace_re = re.compile(r"\s+")
+
+
+def normalize_text(text):
+    """Normalize a comment so trivially different copies share a cache entry"""
+    text = unicodedata.normalize("NFKC", text or "")
+    return _whitespace_re.sub(" ", text).strip().lower()
+
+
+def cache_key(text, model_id):
+    """Hash of the normalized comment text plus the model identifier"""
+    payload = f"{model_id}\x00{normalize_text(text)}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SentimentCache:
+    """Two-tier sentiment result cache: in-process LRU backed by the SentimentCacheEntry table"""
+
+    def __init__(self, model_id, max_entries=None, persistent=None):
+        self.model_id = model_id
+        self.max_entries = max_entries or getattr(settings, 'SENTIMENT_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)
+        if persistent is None:
+            persistent = getattr(settings, 'SENTIMENT_CACHE_PERSISTENT', True)
+        self.persistent = persistent
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+
+    def _remember(self, key, label):
+        self._entries[key] = label
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_many(self, texts):
+        """Return {index: label} for every text that has a cached result"""
+        keys = [cache_key(text, self.model_id) for text in texts]
+        found = {}
+        missing = {}
+
+        with self._lock:
+            for index, key in enumerate(keys):
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    found[index] = self._entries[key]
+                else:
+                    missing.setdefault(key, []).append(index)
+
+        if missing and self.persistent:
+            try:
+                rows = SentimentCacheEntry.objects.filter(
+                    key__in=list(missing)
+                ).values_list('key', 'sentiment')
+                with self._lock:
+                    for key, label in rows:
+                        self._remember(key, label)
+                        for index in missing.pop(key):
+                            found[index] = label
+                            self.persistent_hits += 1
+            except Exception as e:
+                logger.error(f"Sentiment cache lookup failed: {e}")
+
+        with self._lock:
+            self.hits += len(found)
+            self.misses += sum(len(indices) for indices in missing.values())
+
+        return found
+
+    def set_many(self, texts, labels):
+        """Store freshly computed labels in both tiers"""
+        entries = {}
+        for text, label in zip(texts, labels):
+            entries[cache_key(text, self.model_id)] = label
+
+        with self._lock:
+            for key, label in entries.items():
+                self._remember(key, label)
+
+        if entries and self.persistent:
+            try:
+                SentimentCacheEntry.objects.bulk_create(
+                    [
+                        SentimentCacheEntry(key=key, model_id=self.model_id, sentiment=label)
+                        for key, label in entries.items()
+                    ],
+                    ignore_conflicts=True,
+                )
+            except Exception as e:
+                logger.error(f"Sentiment cache write failed: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'model_id': self.model_id,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'persistent': self.persistent,
+                'hits': self.hits,
+                'persistent_hits': self.persistent_hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0,
+            }
@@ -0,0 +1,69 @@
+import logging
+import math
+import time
+from itertools import islice
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_EARLY_STOP_MIN_COMMENTS = 400
+Z_95 = 1.96
+
+
+def get_chunk_size():
+    return getattr(settings, 'ANALYSIS_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+
+
+def iter_chunks(iterable, size):
+    """Yield lists of up to ``size`` items, pulling from ``iterable`` only as each chunk is needed"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def guarded(iterable, description):
+    """Stop iterating, keeping what was already yielded, if the source raises"""
+    try:
+        yield from iterable
+    except Exception as e:
+        logger.error(f"Error fetching {description}: {e}")
+
+
+def timed(iterable, histogram, **labels):
+    """Observe the total time spent waiting on ``iterable`` once it is exhausted or closed"""
+    waited = 0.0
+    iterator = iter(iterable)
+    try:
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                waited += time.perf_counter() - started
+            yield item
+    finally:
+        histogram.observe(waited, **labels)
+
+
+def positive_margin(positive, total):
+    """Half-width, in percentage points, of the 95% confidence interval on positive_percent"""
+    if not total:
+        return float("inf")
+    share = positive / total
+    return Z_95 * math.sqrt(share * (1 - share) / total) * 100
+
+
+def should_stop_early(positive, total, margin=None, min_comments=None):
+    """True once ``ANALYSIS_EARLY_STOP_MARGIN`` is set and the interval is at least that tight"""
+    margin = margin if margin is not None else getattr(settings, 'ANALYSIS_EARLY_STOP_MARGIN', None)
+    if not margin:
+        return False
+    min_comments = min_comments or getattr(settings, 'ANALYSIS_EARLY_STOP_MIN_COMMENTS', DEFAULT_EARLY_STOP_MIN_COMMENTS)
+    return total >= min_comments and positive_margin(positive, total) <= margin
@@ -0,0 +1,157 @@
+"""In-memory stand-in for throttling platform APIs, used by the tests and benchmarks/stub_server.py
+
+Serves YouTube commentThreads pages and Amazon-style review pages. It enforces
+its own token bucket per API key (or per client when no key is sent) and a cap
+on concurrent requests, answering 429 with a Retry-After header once either is
+exceeded.
+"""
+import json
+import math
+import threading
+import time
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+YOUTUBE_PAGE_SIZE = 100
+REVIEWS_PAGE_SIZE = 10
+
+
+class ServerBucket:
+    """The server's side of rate limiting: rate/s with bursts of ``capacity``; no queueing"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def take(self):
+        """Return 0 if a token was taken, else the seconds until one is available"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+
+class StubState:
+    def __init__(self, rate, burst, max_concurrency, latency, comments, retry_after=True):
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.latency = latency
+        self.comments = comments
+        self.retry_after = retry_after
+        self.lock = threading.Lock()
+        self.buckets = {}
+        self.in_flight = 0
+        self.stats = {'requests': 0, 'served': 0, 'throttled': 0, 'max_in_flight': 0}
+
+    def admit(self, key):
+        """Return None to serve the request, or the Retry-After seconds to throttle it"""
+        with self.lock:
+            self.stats['requests'] += 1
+            if self.in_flight >= self.max_concurrency:
+                self.stats['throttled'] += 1
+                return 1
+            bucket = self.buckets.setdefault(key, ServerBucket(self.rate, self.burst))
+            wait = bucket.take()
+            if wait:
+                self.stats['throttled'] += 1
+                return wait
+            self.in_flight += 1
+            self.stats['served'] += 1
+            self.stats['max_in_flight'] = max(self.stats['max_in_flight'], self.in_flight)
+            return None
+
+    def done(self):
+        with self.lock:
+            self.in_flight -= 1
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    state = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, status, body, content_type, headers=None):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        query = {name: values[0] for name, values in parse_qs(parts.query).items()}
+        if parts.path == '/stats':
+            with self.state.lock:
+                stats = dict(self.state.stats)
+            return self.send_body(200, json.dumps(stats), 'application/json')
+
+        wait = self.state.admit(query.get('key') or self.client_address[0])
+        if wait is not None:
+            headers = {'Retry-After': str(math.ceil(wait))} if self.state.retry_after else {}
+            return self.send_body(429, json.dumps({'error': 'rate limited'}), 'application/json', headers)
+        try:
+            time.sleep(self.state.latency)
+            if parts.path.endswith('/commentThreads'):
+                self.youtube_page(query)
+            elif '/product-reviews/' in parts.path:
+                self.reviews_page(query)
+            else:
+                self.send_body(404, '', 'text/plain')
+        finally:
+            self.state.done()
+
+    def youtube_page(self, query):
+        start = int(query.get('pageToken', 0))
+        end = min(start + YOUTUBE_PAGE_SIZE, self.state.comments)
+        page = {
+            'items': [
+                {'snippet': {'topLevelComment': {'snippet': {'textDisplay': f"{query.get('videoId')} comment {n}"}}}}
+                for n in range(start, end)
+            ]
+        }
+        if end < self.state.comments:
+            page['nextPageToken'] = str(end)
+        self.send_body(200, json.dumps(page), 'application/json')
+
+    def reviews_page(self, query):
+        start = (int(query.get('pageNumber', 1)) - 1) * REVIEWS_PAGE_SIZE
+        end = min(start + REVIEWS_PAGE_SIZE, self.state.comments)
+        spans = "".join(
+            f'<span data-hook="review-body">{escape(f"review {n}")}</span>' for n in range(start, end)
+        )
+        self.send_body(200, f"<html><body>{spans}</body></html>", 'text/html')
+
+
+class StubServer:
+    """Runs the stub on a background thread; use as a context manager"""
+
+    def __init__(self, port=0, rate=5.0, burst=5, max_concurrency=4, latency=0.05, comments=500, retry_after=True):
+        self.state = StubState(rate, burst, max_concurrency, latency, comments, retry_after)
+        handler = type('BoundStubHandler', (StubHandler,), {'state': self.state})
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,40 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from SentimentAIapp import views
+from SentimentAIapp.models import AnalysisHistory, Comment
+
+URL = "https://www.youtube.com/watch?v=abc123"
+
+
+def reversed_batches(comments, stage_counts=None, engine=None):
+    """Score in two batches, the second half first, like cache hits arriving before model batches"""
+    middle = len(comments) // 2
+    for indices in (list(range(middle, len(comments))), list(range(middle))):
+        if indices:
+            yield indices, ['POSITIVE' if 'good' in comments[index] else 'NEGATIVE' for index in indices]
+
+
+@override_settings(NLP_ENRICHMENT=False, ANALYSIS_CHUNK_SIZE=4)
+class AnalyzeCommentsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice', password='secret123')
+
+    def analyze(self, comments):
+        with mock.patch.object(views, 'iter_scored_batches', reversed_batches):
+            return views.analyze_comments({'platform': 'YouTube', 'comments': iter(comments)}, URL, self.user)
+
+    def test_rows_are_written_in_fetch_order(self):
+        comments = [f"comment {n} {'good' if n % 3 else 'bad'}" for n in range(10)]
+        self.analyze(comments)
+        self.assertEqual(list(Comment.objects.order_by('id').values_list('content', flat=True)), comments)
+
+    def test_totals_and_history(self):
+        result = self.analyze(["good one", "bad one", "good two", "good three"])
+        self.assertEqual(result['total_comments'], 4)
+        self.assertEqual(result['positive_percent'], 75.0)
+        history = AnalysisHistory.objects.get(user=self.user)
+        self.assertEqual(history.total_comments, 4)
+        self.assertEqual(history.trend_score, 75.0)
@@ -0,0 +1,71 @@
+import gzip
+import json
+import unittest
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from SentimentAIapp.auth import generate_token, hash_token
+from SentimentAIapp.models import Comment
+from SentimentAIapp.tokens import get_token_backend
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+class ExportViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice', password='secret123')
+        token = generate_token()
+        get_token_backend().issue(hash_token(token), self.user)
+        self.headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+        for n in range(3):
+            Comment.objects.create(user=self.user, platform='YouTube', content=f'comment {n}', sentiment='POSITIVE')
+
+    def export(self, **params):
+        response = self.client.get(reverse('export_data'), params, **self.headers)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, body
+
+    def test_csv(self):
+        response, body = self.export(file_format='csv')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        lines = body.decode('utf-8').splitlines()
+        self.assertTrue(lines[0].startswith('id,'))
+        self.assertEqual(len(lines), 4)
+
+    def test_ndjson(self):
+        response, body = self.export(file_format='ndjson')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in body.decode('utf-8').splitlines()]
+        self.assertEqual(sorted(row['content'] for row in rows), ['comment 0', 'comment 1', 'comment 2'])
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_parquet(self):
+        response, body = self.export(file_format='parquet')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/vnd.apache.parquet')
+        self.assertTrue(body.startswith(b'PAR1'))
+
+    def test_gzip(self):
+        response, body = self.export(file_format='ndjson', gzip='1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertEqual(len(gzip.decompress(body).splitlines()), 3)
+
+    def test_defaults_to_csv(self):
+        response, _ = self.export()
+        self.assertEqual(response['Content-Type'], 'text/csv')
+
+    def test_unknown_format(self):
+        response, _ = self.export(file_format='xml')
+        self.assertEqual(response.status_code, 400)
+
+    def test_requires_authentication(self):
+        response = self.client.get(reverse('export_data'), {'file_format': 'csv'})
+        self.assertEqual(response.status_code, 401)
@@ -0,0 +1,51 @@
+import threading
+
+from django.test import SimpleTestCase
+
+from SentimentAIapp.http_client import prefetch
+
+
+class PrefetchTests(SimpleTestCase):
+    def test_yields_every_item_in_order(self):
+        self.assertEqual(list(prefetch(iter(range(10)), depth=2)), list(range(10)))
+
+    def test_reraises_producer_errors(self):
+        def pages():
+            yield 1
+            raise ValueError("page 2 failed")
+
+        with self.assertRaises(ValueError):
+            list(prefetch(pages(), depth=2))
+
+    def test_abandoned_producer_exits_and_closes_its_source(self):
+        closed = threading.Event()
+
+        def pages():
+            try:
+                for n in range(100):
+                    yield n
+            finally:
+                closed.set()
+
+        items = prefetch(pages(), depth=1)
+        self.assertEqual(next(items), 0)
+        items.close()
+        self.assertTrue(closed.wait(5))
+
+    def test_abandoned_producer_with_a_full_buffer_exits_after_its_last_item(self):
+        finished = threading.Event()
+
+        def pages():
+            yield 1
+            yield 2
+            finished.set()
+
+        items = prefetch(pages(), depth=1)
+        self.assertEqual(next(items), 1)
+        # The producer has queued 2 and is now waiting to queue the end marker
+        self.assertTrue(finished.wait(5))
+        items.close()
+        for thread in threading.enumerate():
+            if thread.name == "prefetch":
+                thread.join(5)
+                self.assertFalse(thread.is_alive())
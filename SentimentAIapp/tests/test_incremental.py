@@ -0,0 +1,94 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from SentimentAIapp import incremental, views
+from SentimentAIapp.models import Comment, SourceWatermark
+
+URL = "https://www.youtube.com/watch?v=abc123"
+
+
+def label_batches(comments, stage_counts=None, engine=None):
+    if comments:
+        yield list(range(len(comments))), ['POSITIVE' if 'good' in comment else 'NEGATIVE' for comment in comments]
+
+
+def keys_for(comments):
+    keys = []
+    list(incremental.skip_known(comments, set(), keys))
+    return set(keys)
+
+
+class SkipKnownTests(SimpleTestCase):
+    def test_yields_only_new_comments(self):
+        known = keys_for(["b", "c"])
+        new_keys = []
+        self.assertEqual(list(incremental.skip_known(["a", "b", "c"], known, new_keys)), ["a"])
+        self.assertEqual(len(new_keys), 1)
+
+    def test_repeated_texts_count_as_separate_comments(self):
+        known = keys_for(["Nice product"])
+        new_keys = []
+        fresh = list(incremental.skip_known(["Nice product", "nice  product", "Nice product"], known, new_keys))
+        self.assertEqual(len(fresh), 2)
+        self.assertEqual(len(set(new_keys)), 2)
+
+    def test_stops_after_a_run_of_known_comments(self):
+        older = [f"comment {n}" for n in range(10)]
+        comments = iter(["newest"] + older)
+        fresh = list(incremental.skip_known(comments, keys_for(older), [], stop_after=3))
+        self.assertEqual(fresh, ["newest"])
+        self.assertEqual(next(comments), "comment 3")
+
+    @override_settings(INCREMENTAL_MAX_KEYS=2)
+    def test_key_buffer_is_bounded(self):
+        buffer = incremental.new_key_buffer()
+        buffer.extend(["a", "b", "c"])
+        self.assertEqual(list(buffer), ["b", "c"])
+
+
+@override_settings(NLP_ENRICHMENT=False, INCREMENTAL_ANALYSIS=True)
+class IncrementalAnalysisTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice', password='secret123')
+
+    def analyze(self, comments):
+        watermark = incremental.load_watermark(self.user, URL)
+        new_keys = incremental.new_key_buffer()
+        comments_data = {
+            'platform': 'YouTube',
+            'comments': incremental.skip_known(comments, incremental.load_known_keys(watermark), new_keys),
+            'comment_keys': new_keys,
+            'watermark': watermark,
+            'baseline': incremental.baseline_counts(watermark),
+        }
+        with mock.patch.object(views, 'iter_scored_batches', label_batches):
+            return views.analyze_comments(comments_data, URL, self.user)
+
+    def test_second_run_scores_only_new_comments_and_merges_totals(self):
+        first = self.analyze(["good one", "bad one"])
+        self.assertEqual((first['total_comments'], first['new_comments']), (2, 2))
+
+        second = self.analyze(["good two", "good one", "bad one"])
+        self.assertEqual((second['total_comments'], second['new_comments']), (3, 1))
+        self.assertAlmostEqual(second['positive_percent'], 66.67)
+        self.assertEqual(Comment.objects.filter(user=self.user).count(), 3)
+
+        watermark = SourceWatermark.objects.get(user=self.user)
+        self.assertEqual((watermark.total_comments, watermark.positive_count), (3, 2))
+        self.assertEqual(len(watermark.seen_keys), 3)
+
+    def test_equivalent_urls_share_a_watermark(self):
+        self.analyze(["good one"])
+        self.assertIsNotNone(incremental.load_watermark(self.user, "https://youtu.be/abc123"))
+
+    def test_watermarks_are_per_user(self):
+        self.analyze(["good one"])
+        other = User.objects.create_user(username='bob', password='secret123')
+        self.assertIsNone(incremental.load_watermark(other, URL))
+
+    @override_settings(INCREMENTAL_MAX_KEYS=2)
+    def test_stored_keys_are_capped(self):
+        self.analyze(["a", "b", "c"])
+        self.assertEqual(len(SourceWatermark.objects.get(user=self.user).seen_keys), 2)
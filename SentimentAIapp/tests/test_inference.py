@@ -0,0 +1,32 @@
+from django.test import SimpleTestCase
+
+from SentimentAIapp.inference import split_windows
+
+
+class SplitWindowsTests(SimpleTestCase):
+    def test_short_input_is_one_window(self):
+        ids = list(range(5))
+        self.assertEqual(split_windows(ids, 8, 2, 4), [ids])
+
+    def test_windows_overlap_by_the_configured_amount(self):
+        windows = split_windows(list(range(10)), 4, 2, 8)
+        self.assertEqual(windows, [[0, 1, 2, 3], [2, 3, 4, 5], [4, 5, 6, 7], [6, 7, 8, 9]])
+
+    def test_last_window_is_aligned_to_the_end(self):
+        windows = split_windows(list(range(11)), 4, 2, 8)
+        self.assertEqual(windows[-1], [7, 8, 9, 10])
+        self.assertTrue(all(len(window) == 4 for window in windows))
+
+    def test_every_token_is_covered(self):
+        ids = list(range(1000))
+        windows = split_windows(ids, 64, 16, 100)
+        self.assertEqual(sorted({token for window in windows for token in window}), ids)
+
+    def test_too_many_windows_keeps_first_and_last_evenly_spaced(self):
+        ids = list(range(100))
+        windows = split_windows(ids, 10, 0, 3)
+        self.assertEqual([window[0] for window in windows], [0, 40, 90])
+
+    def test_overlap_at_least_the_window_size_still_advances(self):
+        windows = split_windows(list(range(6)), 3, 5, 10)
+        self.assertEqual([window[0] for window in windows], [0, 1, 2, 3])
@@ -0,0 +1,75 @@
+import os
+import socket
+import tempfile
+import threading
+
+from django.test import SimpleTestCase
+
+from SentimentAIapp.inference_server import InferenceClient, InferenceServer, recv_message
+
+
+class FakeEngine:
+    def predict(self, comments):
+        return ['POSITIVE' if 'good' in comment else 'NEGATIVE' for comment in comments]
+
+
+class InferenceClientTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.directory.name, 'sentiment.sock')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def start_server(self):
+        server = InferenceServer(self.socket_path, FakeEngine(), window_ms=1)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def test_predict(self):
+        self.start_server()
+        client = InferenceClient(self.socket_path, timeout=5)
+        self.addCleanup(client._reset)
+        self.assertEqual(client.predict(["good", "meh"]), ['POSITIVE', 'NEGATIVE'])
+
+    def test_retries_once_on_a_stale_connection(self):
+        self.start_server()
+        client = InferenceClient(self.socket_path, timeout=5)
+        self.addCleanup(client._reset)
+        stale, peer = socket.socketpair()
+        peer.close()
+        client._local.sock = stale
+        self.assertEqual(client.predict(["good"]), ['POSITIVE'])
+
+    def test_missing_socket_raises_after_one_retry(self):
+        client = InferenceClient(self.socket_path, timeout=5)
+        with self.assertRaises(FileNotFoundError):
+            client.predict(["good"])
+
+    def test_timeouts_are_not_retried(self):
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(self.socket_path)
+        listener.listen()
+        self.addCleanup(listener.close)
+        received = []
+
+        def serve():
+            # Accept every connection and read requests without ever answering
+            while True:
+                try:
+                    conn, _ = listener.accept()
+                except OSError:
+                    return
+                try:
+                    received.append(recv_message(conn))
+                except (ConnectionError, OSError):
+                    pass
+
+        threading.Thread(target=serve, daemon=True).start()
+        client = InferenceClient(self.socket_path, timeout=0.2)
+        with self.assertRaises(socket.timeout):
+            client.predict(["good"])
+        self.assertEqual(len(received), 1)
+        self.assertIsNone(client._local.sock)
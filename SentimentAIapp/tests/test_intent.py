@@ -0,0 +1,64 @@
+import re
+
+from django.test import SimpleTestCase, override_settings
+
+from SentimentAIapp import intent
+
+
+class TriePatternTests(SimpleTestCase):
+    def test_matches_exactly_the_phrases(self):
+        phrases = ['buy', 'buying', 'bought', 'add to cart']
+        pattern = re.compile(rf"\b{intent.trie_pattern(phrases)}\b")
+        for phrase in phrases:
+            self.assertEqual(pattern.fullmatch(phrase).group(0), phrase)
+        for text in ['bu', 'buyin', 'add to', 'cart']:
+            self.assertIsNone(pattern.fullmatch(text), text)
+
+    def test_shared_prefixes_are_factored(self):
+        self.assertEqual(intent.trie_pattern(['buy', 'buying']), "buy(?:ing)?")
+
+    def test_spaces_match_any_whitespace(self):
+        pattern = re.compile(intent.trie_pattern(['take my money']))
+        self.assertIsNotNone(pattern.fullmatch("take  my\tmoney"))
+
+
+class PurchaseIntentDetectorTests(SimpleTestCase):
+    def setUp(self):
+        self.detector = intent.PurchaseIntentDetector(intent.DEFAULT_PURCHASE_PHRASES)
+
+    def test_flags_and_matches_per_comment(self):
+        flags, matches = self.detector.detect(["I will order two", "nice video", "Add to  CART now, then checkout"])
+        self.assertEqual(flags, [True, False, True])
+        self.assertEqual(matches, [['will order'], [], ['add to cart', 'checkout']])
+
+    def test_longest_phrase_wins(self):
+        _, matches = self.detector.detect(["buying this"])
+        self.assertEqual(matches, [['buying']])
+
+    def test_whole_words_only(self):
+        flags, _ = self.detector.detect(["reorder the list", "the cartoon was fun", "buyer beware"])
+        self.assertEqual(flags, [False, False, False])
+
+    def test_phrases_never_span_comments(self):
+        flags, _ = self.detector.detect(["i will", "order matters"])
+        self.assertEqual(flags, [False, True])
+        self.assertEqual(self.detector.detect(["want to", "buy"])[1], [[], ['buy']])
+
+    def test_text_that_changes_length_when_lowercased(self):
+        flags, matches = self.detector.detect(["İstanbul store, BUY here", "no intent"])
+        self.assertEqual(flags, [True, False])
+        self.assertEqual(matches[0], ['buy'])
+
+    def test_empty_batch(self):
+        self.assertEqual(self.detector.detect([]), ([], []))
+
+
+class GetDetectorTests(SimpleTestCase):
+    @override_settings(PURCHASE_INTENT_PHRASES={'YouTube': ['subscribe'], 'default': ['preorder']})
+    def test_platform_phrases_then_default(self):
+        self.assertEqual(intent.get_detector('YouTube').phrases, ['subscribe'])
+        self.assertEqual(intent.get_detector('Twitter').phrases, ['preorder'])
+
+    def test_built_in_phrases(self):
+        self.assertIs(intent.get_detector(), intent.get_detector('Twitter'))
+        self.assertIn('take my money', intent.get_detector().phrases)
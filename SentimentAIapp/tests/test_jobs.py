@@ -0,0 +1,118 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from SentimentAIapp import jobs
+from SentimentAIapp.models import AnalysisJob
+
+URL = "https://www.youtube.com/watch?v=abc123"
+
+
+@override_settings(ANALYSIS_JOB_INLINE_WORKERS=False, ANALYSIS_JOB_LEASE_SECONDS=300)
+class JobQueueTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice', password='secret123')
+
+    def expire_lease(self, job):
+        AnalysisJob.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(seconds=301))
+
+    def test_submit_reuses_an_active_job(self):
+        job, created = jobs.submit_job(self.user, URL)
+        again, created_again = jobs.submit_job(self.user, URL)
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertEqual(again.pk, job.pk)
+
+    def test_submit_after_a_finished_job_creates_a_new_one(self):
+        job, _ = jobs.submit_job(self.user, URL)
+        AnalysisJob.objects.filter(pk=job.pk).update(status=AnalysisJob.STATUS_DONE)
+        again, created = jobs.submit_job(self.user, URL)
+        self.assertTrue(created)
+        self.assertNotEqual(again.pk, job.pk)
+
+    def test_claim_takes_the_oldest_queued_job(self):
+        first, _ = jobs.submit_job(self.user, URL)
+        jobs.submit_job(self.user, URL + "x")
+        claimed = jobs.claim_next_job()
+        self.assertEqual(claimed.pk, first.pk)
+        self.assertEqual(claimed.status, AnalysisJob.STATUS_RUNNING)
+        self.assertNotEqual(jobs.claim_next_job().pk, first.pk)
+        self.assertIsNone(jobs.claim_next_job())
+
+    def test_running_job_with_a_live_lease_stays_active(self):
+        jobs.submit_job(self.user, URL)
+        job = jobs.claim_next_job()
+        self.assertEqual(jobs.requeue_stale_jobs(), 0)
+        self.assertTrue(jobs.active_jobs().filter(pk=job.pk).exists())
+
+    def test_expired_lease_is_requeued_with_its_progress_reset(self):
+        jobs.submit_job(self.user, URL)
+        job = jobs.claim_next_job()
+        AnalysisJob.objects.filter(pk=job.pk).update(progress=40, total_comments=90)
+        self.expire_lease(job)
+        self.assertFalse(jobs.active_jobs().filter(pk=job.pk).exists())
+
+        self.assertEqual(jobs.requeue_stale_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, AnalysisJob.STATUS_QUEUED)
+        self.assertEqual((job.progress, job.total_comments), (0, 0))
+
+    def test_submit_requeues_an_orphaned_job_instead_of_duplicating_it(self):
+        job, _ = jobs.submit_job(self.user, URL)
+        jobs.claim_next_job()
+        self.expire_lease(job)
+        again, created = jobs.submit_job(self.user, URL)
+        self.assertFalse(created)
+        self.assertEqual(again.pk, job.pk)
+        self.assertEqual(again.status, AnalysisJob.STATUS_QUEUED)
+
+
+@override_settings(ANALYSIS_JOB_INLINE_WORKERS=False)
+class RunJobTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice', password='secret123')
+        jobs.submit_job(self.user, URL)
+        self.job = jobs.claim_next_job()
+
+    def run_with(self, **analysis):
+        with mock.patch('SentimentAIapp.views.run_url_analysis', **analysis) as run:
+            jobs.run_job(self.job)
+        self.job.refresh_from_db()
+        return run
+
+    def test_success_stores_the_result(self):
+        def analysis(url, user, force_refresh, progress_callback):
+            progress_callback(0, None)
+            progress_callback(5, 10)
+            return {'total_comments': 10, 'positive_percent': 50.0}
+
+        self.run_with(side_effect=analysis)
+        self.assertEqual(self.job.status, AnalysisJob.STATUS_DONE)
+        self.assertEqual((self.job.progress, self.job.total_comments), (10, 10))
+        self.assertEqual(self.job.result['positive_percent'], 50.0)
+
+    def test_progress_is_recorded_while_running(self):
+        seen = []
+
+        def analysis(url, user, force_refresh, progress_callback):
+            progress_callback(5, 12)
+            job = AnalysisJob.objects.get(pk=self.job.pk)
+            seen.append((job.progress, job.total_comments))
+            return {'total_comments': 12}
+
+        self.run_with(side_effect=analysis)
+        self.assertEqual(seen, [(5, 12)])
+
+    def test_error_result_fails_the_job(self):
+        self.run_with(return_value={'error': 'Unsupported URL'})
+        self.assertEqual(self.job.status, AnalysisJob.STATUS_FAILED)
+        self.assertEqual(self.job.error, 'Unsupported URL')
+
+    def test_partial_result_fails_the_job_but_keeps_the_result(self):
+        self.run_with(return_value={'total_comments': 8, 'partial': True, 'unscored_comments': 2})
+        self.assertEqual(self.job.status, AnalysisJob.STATUS_FAILED)
+        self.assertEqual(self.job.result['unscored_comments'], 2)
+        self.assertIn('2 fetched comments', self.job.error)
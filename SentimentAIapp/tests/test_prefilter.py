@@ -0,0 +1,72 @@
+import json
+import os
+import unittest
+
+from django.test import SimpleTestCase
+
+from SentimentAIapp import prefilter, registry
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'benchmarks', 'fixtures')
+
+
+def fixture_comments():
+    comments = []
+    for name in sorted(os.listdir(FIXTURES)):
+        if name.endswith('.json'):
+            with open(os.path.join(FIXTURES, name), encoding='utf-8') as f:
+                comments.extend(json.load(f))
+    return comments
+
+
+class LexiconTests(SimpleTestCase):
+    def test_short_polar_comments(self):
+        self.assertEqual(prefilter.lexicon_score("Amazing!!")[0], 'POSITIVE')
+        self.assertEqual(prefilter.lexicon_score("🔥🔥🔥")[0], 'POSITIVE')
+        self.assertEqual(prefilter.lexicon_score("Scam 👎")[0], 'NEGATIVE')
+
+    def test_mild_praise_is_left_to_the_model(self):
+        for text in ["Nice product", "good", "👍"]:
+            self.assertIsNone(prefilter.lexicon_score(text)[0], text)
+
+    def test_negation_and_long_comments_are_left_to_the_model(self):
+        self.assertIsNone(prefilter.lexicon_score("not amazing")[0])
+        self.assertIsNone(prefilter.lexicon_score("the best one I have bought this year")[0])
+
+    def test_near_duplicates_share_a_key(self):
+        keys = {prefilter.near_duplicate_key(text) for text in ["Great video!!!", "great   video", "GREAT VIDEO"]}
+        self.assertEqual(len(keys), 1)
+
+
+class LexiconAgreesWithModelTests(SimpleTestCase):
+    """Every label the lexicon decides must be the label the model path would give"""
+
+    @classmethod
+    def setUpClass(cls):
+        try:
+            cls.engine = registry.load_local_engine('torch')
+        except (ImportError, OSError) as e:
+            raise unittest.SkipTest(f"Sentiment model unavailable: {e}")
+        super().setUpClass()
+
+    def assert_agrees(self, comments):
+        threshold = prefilter.DEFAULT_CONFIDENCE_THRESHOLD
+        decided = [
+            (comment, label)
+            for comment in comments
+            for label, confidence in [prefilter.lexicon_score(comment)]
+            if label and confidence >= threshold
+        ]
+        model_labels = self.engine.predict([comment for comment, _ in decided])
+        disagreements = [
+            (comment, label, model_label)
+            for (comment, label), model_label in zip(decided, model_labels)
+            if label != model_label
+        ]
+        self.assertEqual(disagreements, [])
+
+    def test_fixture_comments(self):
+        self.assert_agrees(fixture_comments())
+
+    def test_each_lexicon_term(self):
+        terms = prefilter.POSITIVE_WORDS | prefilter.NEGATIVE_WORDS | prefilter.POSITIVE_EMOJI | prefilter.NEGATIVE_EMOJI
+        self.assert_agrees(sorted(terms))
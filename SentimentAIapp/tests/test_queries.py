@@ -0,0 +1,91 @@
+import base64
+from datetime import time as dt_time, timedelta
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from SentimentAIapp.auth import generate_token, hash_token
+from SentimentAIapp.models import Comment
+from SentimentAIapp.queries import (
+    MAX_PAGE_SIZE, QueryParamError, decode_cursor, keyset_page, parse_bound, parse_limit,
+)
+from SentimentAIapp.tokens import get_token_backend
+
+
+class ParseTests(SimpleTestCase):
+    def test_bare_dates_cover_the_whole_day(self):
+        start = parse_bound("2024-03-01")
+        end = parse_bound("2024-03-01", end_of_day=True)
+        self.assertEqual(start.time(), dt_time.min)
+        self.assertEqual(end.time(), dt_time.max)
+        self.assertTrue(timezone.is_aware(start))
+
+    def test_datetimes_are_kept(self):
+        self.assertEqual(parse_bound("2024-03-01T12:30:00+00:00").hour, 12)
+
+    def test_malformed_and_impossible_dates_are_rejected(self):
+        for value in ["yesterday", "2024-02-30", "2024-13-01", "2024-02-30T10:00:00"]:
+            with self.assertRaises(QueryParamError, msg=value):
+                parse_bound(value)
+
+    def test_limit_is_clamped(self):
+        self.assertEqual(parse_limit("0"), 1)
+        self.assertEqual(parse_limit(str(MAX_PAGE_SIZE + 1)), MAX_PAGE_SIZE)
+        with self.assertRaises(QueryParamError):
+            parse_limit("ten")
+
+    def test_bad_cursors_are_rejected(self):
+        for raw in ["not-base64!", base64.urlsafe_b64encode(b"no separator").decode(),
+                    base64.urlsafe_b64encode(b"not a date|5").decode(),
+                    base64.urlsafe_b64encode(b"2024-02-30T00:00:00|5").decode()]:
+            with self.assertRaises(QueryParamError, msg=raw):
+                decode_cursor(raw)
+
+
+class KeysetPageTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice', password='secret123')
+        for n in range(7):
+            Comment.objects.create(user=self.user, platform='YouTube', content=f'comment {n}', sentiment='POSITIVE')
+
+    def walk(self, limit):
+        seen = []
+        cursor = None
+        while True:
+            params = {'limit': str(limit)}
+            if cursor:
+                params['cursor'] = cursor
+            rows, cursor = keyset_page(Comment.objects.filter(user=self.user), params)
+            seen.extend(row.content for row in rows)
+            if not cursor:
+                return seen
+
+    def test_pages_newest_first_without_gaps_or_repeats(self):
+        self.assertEqual(self.walk(3), [f'comment {n}' for n in reversed(range(7))])
+
+    def test_rows_sharing_a_timestamp_are_ordered_by_id(self):
+        Comment.objects.update(created_at=timezone.now() - timedelta(days=1))
+        self.assertEqual(self.walk(2), [f'comment {n}' for n in reversed(range(7))])
+
+    def test_last_full_page_has_no_cursor(self):
+        rows, cursor = keyset_page(Comment.objects.all(), {'limit': '7'})
+        self.assertEqual(len(rows), 7)
+        self.assertIsNone(cursor)
+
+
+class ListCommentsViewTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='alice', password='secret123')
+        token = generate_token()
+        get_token_backend().issue(hash_token(token), user)
+        self.headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+    def test_impossible_date_is_a_bad_request(self):
+        response = self.client.get(reverse('list_comments'), {'start': '2024-02-30'}, **self.headers)
+        self.assertEqual(response.status_code, 400)
+
+    def test_bad_cursor_is_a_bad_request(self):
+        response = self.client.get(reverse('list_comments'), {'cursor': 'garbage'}, **self.headers)
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,195 @@
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from SentimentAIapp import http_client, ratelimit
+from SentimentAIapp.tests.stub_server import StubServer
+
+PLATFORM = 'Test'
+FAST_LIMITS = {
+    PLATFORM: {'rate': 1000, 'burst': 1000, 'max_concurrency': 4, 'credential_rate': 1000, 'credential_burst': 1000},
+}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class TokenBucketTests(SimpleTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.bucket = ratelimit.TokenBucket(rate=2, capacity=2, clock=self.clock)
+
+    def test_burst_is_free_then_callers_queue(self):
+        self.assertEqual(self.bucket.reserve(), 0)
+        self.assertEqual(self.bucket.reserve(), 0)
+        self.assertAlmostEqual(self.bucket.reserve(), 0.5)
+        self.assertAlmostEqual(self.bucket.reserve(), 1.0)
+
+    def test_refill_is_capped_at_capacity(self):
+        self.bucket.reserve()
+        self.bucket.reserve()
+        self.clock.advance(60)
+        self.assertEqual(self.bucket.reserve(), 0)
+        self.assertEqual(self.bucket.reserve(), 0)
+        self.assertAlmostEqual(self.bucket.reserve(), 0.5)
+
+    def test_timeout_does_not_take_the_token(self):
+        self.bucket.reserve()
+        self.bucket.reserve()
+        with self.assertRaises(ratelimit.RateLimitTimeout):
+            self.bucket.reserve(timeout=0.1)
+        self.assertAlmostEqual(self.bucket.reserve(timeout=0.5), 0.5)
+
+    def test_pause_holds_tokens_and_starts_empty(self):
+        self.bucket.pause(5)
+        self.assertAlmostEqual(self.bucket.reserve(), 5.5)
+        self.clock.advance(6)
+        self.assertEqual(self.bucket.reserve(), 0)
+
+    def test_shorter_pause_does_not_cut_a_longer_one(self):
+        self.bucket.pause(10)
+        self.bucket.pause(2)
+        self.clock.advance(9)
+        self.assertAlmostEqual(self.bucket.reserve(), 1.5)
+
+
+class AdaptiveConcurrencyTests(SimpleTestCase):
+    def test_throttling_halves_the_limit(self):
+        concurrency = ratelimit.AdaptiveConcurrency(8)
+        concurrency.acquire()
+        concurrency.release(throttled=True)
+        self.assertEqual(concurrency.limit, 4)
+
+    def test_limit_never_drops_below_the_minimum(self):
+        concurrency = ratelimit.AdaptiveConcurrency(2)
+        for _ in range(3):
+            concurrency.acquire()
+            concurrency.release(throttled=True)
+        self.assertEqual(concurrency.limit, 1)
+
+    def test_successes_grow_the_limit_back_to_the_maximum(self):
+        concurrency = ratelimit.AdaptiveConcurrency(4)
+        concurrency.acquire()
+        concurrency.release(throttled=True)
+        concurrency.acquire()
+        concurrency.release(throttled=False)
+        self.assertAlmostEqual(concurrency.limit, 2.5)
+        for _ in range(10):
+            concurrency.acquire()
+            concurrency.release(throttled=False)
+        self.assertEqual(concurrency.limit, 4)
+
+    def test_unrelated_errors_leave_the_limit(self):
+        concurrency = ratelimit.AdaptiveConcurrency(4)
+        concurrency.acquire()
+        concurrency.release()
+        self.assertEqual(concurrency.limit, 4)
+        self.assertEqual(concurrency.in_flight, 0)
+
+    def test_acquire_times_out_when_every_slot_is_busy(self):
+        concurrency = ratelimit.AdaptiveConcurrency(1)
+        concurrency.acquire()
+        with self.assertRaises(ratelimit.RateLimitTimeout):
+            concurrency.acquire(timeout=0)
+
+
+class RetryAfterTests(SimpleTestCase):
+    def test_seconds(self):
+        self.assertEqual(ratelimit.retry_after({'Retry-After': '7'}), 7)
+
+    def test_http_date(self):
+        later = time.strftime('%a, %d %b %Y %H:%M:%S GMT', time.gmtime(time.time() + 30))
+        self.assertAlmostEqual(ratelimit.retry_after({'Retry-After': later}), 30, delta=2)
+
+    def test_reset_epoch(self):
+        reset = str(int(time.time()) + 60)
+        self.assertAlmostEqual(ratelimit.retry_after({'x-rate-limit-reset': reset}), 60, delta=2)
+
+    def test_past_values_are_zero(self):
+        self.assertEqual(ratelimit.retry_after({'Retry-After': '-3'}), 0)
+
+    def test_missing_or_unparseable(self):
+        self.assertIsNone(ratelimit.retry_after({}))
+        self.assertIsNone(ratelimit.retry_after({'Retry-After': 'soon'}))
+
+
+@override_settings(FETCH_RATE_LIMITS=FAST_LIMITS, FETCH_THROTTLE_RETRIES=2, FETCH_THROTTLE_BACKOFF=0)
+class CallTests(SimpleTestCase):
+    def setUp(self):
+        ratelimit._limiters.clear()
+
+    def tearDown(self):
+        ratelimit._limiters.clear()
+
+    def test_retries_after_throttling(self):
+        responses = [ratelimit.Throttled("429", retry_after=0), ratelimit.Throttled("429"), "ok"]
+
+        def func():
+            response = responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        with mock.patch.object(ratelimit, 'throttled', wraps=ratelimit.throttled) as throttled:
+            self.assertEqual(ratelimit.call(PLATFORM, "key", func), "ok")
+        self.assertEqual(
+            throttled.call_args_list,
+            [mock.call(PLATFORM, "key", 0, 1), mock.call(PLATFORM, "key", None, 2)],
+        )
+
+    def test_gives_up_after_the_configured_retries(self):
+        func = mock.Mock(side_effect=ratelimit.Throttled("429", retry_after=0))
+        with self.assertRaises(ratelimit.Throttled):
+            ratelimit.call(PLATFORM, None, func)
+        self.assertEqual(func.call_count, 3)
+
+    def test_backoff_doubles_without_retry_after(self):
+        with override_settings(FETCH_THROTTLE_BACKOFF=1.5), mock.patch.object(ratelimit.TokenBucket, 'pause') as pause:
+            self.assertEqual(ratelimit.throttled(PLATFORM, None, attempt=3), 6.0)
+        pause.assert_called_once_with(6.0)
+
+    def test_errors_release_slots_without_backing_off(self):
+        with self.assertRaises(KeyError):
+            ratelimit.call(PLATFORM, "key", mock.Mock(side_effect=KeyError))
+        for limiter in ratelimit.limiters_for(PLATFORM, "key"):
+            self.assertEqual(limiter.concurrency.in_flight, 0)
+            self.assertEqual(limiter.concurrency.limit, FAST_LIMITS[PLATFORM]['max_concurrency'])
+
+
+@override_settings(FETCH_RATE_LIMITS=FAST_LIMITS, FETCH_THROTTLE_BACKOFF=0.1, FETCH_RATE_LIMIT_MAX_WAIT=30)
+class StubServerTests(SimpleTestCase):
+    def setUp(self):
+        ratelimit._limiters.clear()
+
+    def tearDown(self):
+        ratelimit._limiters.clear()
+
+    def fetch_all(self, server, pages):
+        url = f"{server.url}/youtube/v3/commentThreads"
+        return [
+            http_client.http_get(url, params={'videoId': 'v', 'key': 'k', 'pageToken': page * 100},
+                                 platform=PLATFORM, credential='k').json()
+            for page in range(pages)
+        ]
+
+    def test_throttled_requests_are_retried_after_retry_after(self):
+        with StubServer(rate=20, burst=2, latency=0, comments=500) as server:
+            pages = self.fetch_all(server, 4)
+            stats = server.state.stats
+        self.assertEqual([len(page['items']) for page in pages], [100] * 4)
+        self.assertEqual(stats['served'], 4)
+        self.assertGreater(stats['throttled'], 0)
+
+    def test_throttled_requests_back_off_without_retry_after(self):
+        with StubServer(rate=20, burst=2, latency=0, comments=500, retry_after=False) as server:
+            pages = self.fetch_all(server, 4)
+        self.assertEqual([len(page['items']) for page in pages], [100] * 4)
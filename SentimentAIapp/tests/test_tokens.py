@@ -0,0 +1,95 @@
+import time
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import RequestFactory, TestCase, override_settings
+
+from SentimentAIapp import tokens
+from SentimentAIapp.auth import generate_token, get_user_from_token, hash_token
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'token-tests'}}
+token_settings = override_settings(AUTH_TOKEN_TTL=100, AUTH_TOKEN_SLIDING=True, CACHES=LOCMEM_CACHES)
+
+
+class TokenBackendTestMixin:
+    backend_class = None
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice', password='secret123')
+        self.backend = self.backend_class()
+        self.now = time.time()
+        self.token_hash = hash_token(generate_token())
+        self.backend.issue(self.token_hash, self.user)
+
+    def at(self, offset):
+        return mock.patch.object(tokens.time, 'time', return_value=self.now + offset)
+
+    def test_resolves_to_the_user_snapshot(self):
+        self.assertEqual(self.backend.resolve(self.token_hash), {'user_id': self.user.id, 'username': 'alice'})
+
+    def test_unknown_and_revoked_tokens(self):
+        self.assertIsNone(self.backend.resolve(hash_token("unknown")))
+        self.backend.revoke(self.token_hash)
+        self.assertIsNone(self.backend.resolve(self.token_hash))
+
+    def test_tokens_expire(self):
+        with self.at(101):
+            self.assertIsNone(self.backend.resolve(self.token_hash))
+
+    def test_use_slides_the_expiry_forward(self):
+        with self.at(50):
+            self.assertIsNotNone(self.backend.resolve(self.token_hash))
+        with self.at(120):
+            self.assertIsNotNone(self.backend.resolve(self.token_hash))
+
+    def test_fixed_expiry_without_sliding(self):
+        self.backend.sliding = False
+        with self.at(50):
+            self.assertIsNotNone(self.backend.resolve(self.token_hash))
+        with self.at(120):
+            self.assertIsNone(self.backend.resolve(self.token_hash))
+
+
+@token_settings
+class MemoryTokenBackendTests(TokenBackendTestMixin, TestCase):
+    backend_class = tokens.MemoryTokenBackend
+
+    def test_sweep_removes_expired_tokens(self):
+        self.backend.store(hash_token("old"), {'user_id': self.user.id, 'username': 'alice'}, time.time() - 10)
+        self.assertEqual(self.backend.sweep(), 1)
+        self.assertIsNotNone(self.backend.resolve(self.token_hash))
+
+
+@token_settings
+class DatabaseTokenBackendTests(TokenBackendTestMixin, TestCase):
+    backend_class = tokens.DatabaseTokenBackend
+
+    def test_sweep_removes_expired_tokens(self):
+        self.backend.store(hash_token("old"), {'user_id': self.user.id, 'username': 'alice'}, time.time() - 10)
+        self.assertEqual(self.backend.sweep(), 1)
+        self.assertIsNotNone(self.backend.resolve(self.token_hash))
+
+    def test_tokens_are_shared_between_backend_instances(self):
+        self.assertIsNotNone(tokens.DatabaseTokenBackend().resolve(self.token_hash))
+
+
+@token_settings
+class CacheTokenBackendTests(TokenBackendTestMixin, TestCase):
+    backend_class = tokens.CacheTokenBackend
+
+
+class UserFromTokenTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='alice', password='secret123')
+
+    def test_snapshot_user_needs_no_query(self):
+        with self.assertNumQueries(0):
+            user = tokens.user_from_snapshot({'user_id': self.user.id, 'username': 'alice'})
+            self.assertEqual((user.pk, user.username), (self.user.pk, 'alice'))
+
+    def test_bearer_token_resolves_to_the_user(self):
+        token = generate_token()
+        tokens.get_token_backend().issue(hash_token(token), self.user)
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(get_user_from_token(request).pk, self.user.pk)
+        self.assertIsNone(get_user_from_token(RequestFactory().get('/')))
@@ -0,0 +1,190 @@
+import logging
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import router
+
+from .models import AuthToken
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_SWEEP_INTERVAL = 3600
+
+
+def get_ttl():
+    return getattr(settings, 'AUTH_TOKEN_TTL', DEFAULT_TTL)
+
+
+def user_from_snapshot(snapshot):
+    """Build a User from a stored snapshot without querying the user table
+
+    Only id and username are loaded; other fields are deferred and fetched
+    on first access.
+    """
+    return User.from_db(router.db_for_read(User), ['id', 'username'], [snapshot['user_id'], snapshot['username']])
+
+
+class TokenBackend:
+    """Maps token hashes to user snapshots with TTL and sliding expiry"""
+
+    def __init__(self):
+        self.ttl = get_ttl()
+        self.sliding = getattr(settings, 'AUTH_TOKEN_SLIDING', True)
+        # Only push the expiry forward once a tenth of the TTL has passed,
+        # so busy tokens don't cost a write per request
+        self.refresh_after = self.ttl / 10
+        self.sweep_interval = getattr(settings, 'AUTH_TOKEN_SWEEP_INTERVAL', DEFAULT_SWEEP_INTERVAL)
+        self._last_sweep = time.monotonic()
+
+    def issue(self, token_hash, user):
+        self.maybe_sweep()
+        snapshot = {'user_id': user.id, 'username': user.username}
+        self.store(token_hash, snapshot, time.time() + self.ttl)
+        return snapshot
+
+    def resolve(self, token_hash):
+        self.maybe_sweep()
+        entry = self.load(token_hash)
+        if entry is None:
+            return None
+        snapshot, expires_at = entry
+        now = time.time()
+        if expires_at <= now:
+            self.delete(token_hash)
+            return None
+        if self.sliding and (now + self.ttl) - expires_at >= self.refresh_after:
+            self.store(token_hash, snapshot, now + self.ttl)
+        return snapshot
+
+    def revoke(self, token_hash):
+        self.delete(token_hash)
+
+    def maybe_sweep(self):
+        if time.monotonic() - self._last_sweep < self.sweep_interval:
+            return
+        self._last_sweep = time.monotonic()
+        try:
+            removed = self.sweep()
+            if removed:
+                logger.info(f"Swept {removed} expired tokens")
+        except Exception as e:
+            logger.error(f"Token sweep failed: {e}")
+
+    def store(self, token_hash, snapshot, expires_at):
+        raise NotImplementedError
+
+    def load(self, token_hash):
+        """Return ``(snapshot, expires_at)`` or None"""
+        raise NotImplementedError
+
+    def delete(self, token_hash):
+        raise NotImplementedError
+
+    def sweep(self):
+        """Remove expired tokens and return how many were removed"""
+        return 0
+
+
+class MemoryTokenBackend(TokenBackend):
+    """Tokens live in this process only; suitable for a single worker"""
+
+    def __init__(self):
+        super().__init__()
+        self._tokens = {}
+        self._lock = threading.Lock()
+
+    def store(self, token_hash, snapshot, expires_at):
+        with self._lock:
+            self._tokens[token_hash] = (snapshot, expires_at)
+
+    def load(self, token_hash):
+        return self._tokens.get(token_hash)
+
+    def delete(self, token_hash):
+        with self._lock:
+            self._tokens.pop(token_hash, None)
+
+    def sweep(self):
+        now = time.time()
+        with self._lock:
+            expired = [key for key, (_, expires_at) in self._tokens.items() if expires_at <= now]
+            for key in expired:
+                del self._tokens[key]
+        return len(expired)
+
+
+class DatabaseTokenBackend(TokenBackend):
+    """Tokens in the AuthToken table, shared by every worker and surviving restarts"""
+
+    def store(self, token_hash, snapshot, expires_at):
+        AuthToken.objects.update_or_create(
+            token_hash=token_hash,
+            defaults={
+                'user_id': snapshot['user_id'],
+                'username': snapshot['username'],
+                'expires_at': datetime.fromtimestamp(expires_at, tz=dt_timezone.utc),
+            },
+        )
+
+    def load(self, token_hash):
+        row = AuthToken.objects.filter(token_hash=token_hash).values_list(
+            'user_id', 'username', 'expires_at'
+        ).first()
+        if row is None:
+            return None
+        user_id, username, expires_at = row
+        return {'user_id': user_id, 'username': username}, expires_at.timestamp()
+
+    def delete(self, token_hash):
+        AuthToken.objects.filter(token_hash=token_hash).delete()
+
+    def sweep(self):
+        cutoff = datetime.now(tz=dt_timezone.utc)
+        removed, _ = AuthToken.objects.filter(expires_at__lte=cutoff).delete()
+        return removed
+
+
+class CacheTokenBackend(TokenBackend):
+    """Tokens in a Django cache; the cache's own expiry does the sweeping"""
+
+    def __init__(self):
+        super().__init__()
+        self.cache = caches[getattr(settings, 'AUTH_TOKEN_CACHE', 'default')]
+
+    def _key(self, token_hash):
+        return f"auth-token:{token_hash}"
+
+    def store(self, token_hash, snapshot, expires_at):
+        timeout = max(1, int(expires_at - time.time()))
+        self.cache.set(self._key(token_hash), (snapshot, expires_at), timeout)
+
+    def load(self, token_hash):
+        return self.cache.get(self._key(token_hash))
+
+    def delete(self, token_hash):
+        self.cache.delete(self._key(token_hash))
+
+
+BACKENDS = {
+    'memory': MemoryTokenBackend,
+    'database': DatabaseTokenBackend,
+    'cache': CacheTokenBackend,
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_token_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                name = getattr(settings, 'AUTH_TOKEN_BACKEND', 'database')
+                _backend = BACKENDS[name]()
+    return _backend
@@ -0,0 +1,76 @@
+import logging
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+from . import platforms
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTLS = {
+    platforms.TWITTER: 300,
+    platforms.INSTAGRAM: 900,
+    platforms.YOUTUBE: 900,
+    platforms.ECOMMERCE: 3600,
+}
+
+TRACKING_PARAMS = {'fbclid', 'gclid', 'igshid', 'si', 'feature', 'ref', 'ref_', 'tag', 'pf_rd_p', 'pf_rd_r'}
+
+
+def strip_tracking(url):
+    parts = urlsplit(url.strip())
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query)
+        if key not in TRACKING_PARAMS and not key.startswith('utm_')
+    )
+    host = parts.netloc.lower()
+    if host.startswith('www.') or host.startswith('m.'):
+        host = host.split('.', 1)[1]
+    return urlunsplit(('https', host, parts.path.rstrip('/'), urlencode(query), ''))
+
+
+def canonicalize_url(url):
+    """Collapse equivalent URLs for the same post, video or product to one key"""
+    platform = platforms.detect_platform(url)
+    source = platforms.source_id(url)
+    if platform and source:
+        return f"{platform.lower()}:{source}"
+    return strip_tracking(url)
+
+
+def get_cache():
+    return caches[getattr(settings, 'ANALYSIS_RESULT_CACHE', 'default')]
+
+
+def cache_key(url, model_id, user):
+    # Per user: incremental results merge in the user's own watermark, and a hit records history for that user only
+    return f"analysis:{model_id}:{user.pk}:{canonicalize_url(url)}"
+
+
+def get_ttl(platform):
+    ttls = {**DEFAULT_TTLS, **getattr(settings, 'ANALYSIS_CACHE_TTLS', {})}
+    return ttls.get(platform, 600)
+
+
+def get_insights(url, model_id, user):
+    try:
+        return get_cache().get(cache_key(url, model_id, user))
+    except Exception as e:
+        logger.error(f"Analysis cache lookup failed: {e}")
+        return None
+
+
+def set_insights(url, model_id, user, insights):
+    if not insights or not insights.get('total_comments'):
+        return
+    ttl = get_ttl(insights.get('platform'))
+    if ttl <= 0:
+        return
+    entry = {'insights': insights, 'cached_at': timezone.now().isoformat()}
+    try:
+        get_cache().set(cache_key(url, model_id, user), entry, ttl)
+    except Exception as e:
+        logger.error(f"Analysis cache write failed: {e}")
@@ -1,10 +1,23 @@
 from django.urls import path
-from .views import fetch_comments, get_analysis_history
+from .views import (
+    fetch_comments, stream_comments, batch_analysis, get_analysis_history, list_comments, get_sentiment_trends,
+    export_data, get_analysis_job, get_cache_stats, get_metrics, monitors, monitor_detail,
+)
 from .auth import register_user, login_user, logout_user, check_auth_status
 
 urlpatterns = [
     path('fetch_comments/', fetch_comments, name='fetch_comments'),
+    path('stream_comments/', stream_comments, name='stream_comments'),
+    path('batch_analysis/', batch_analysis, name='batch_analysis'),
     path('history/', get_analysis_history, name='get_analysis_history'),
+    path('comments/', list_comments, name='list_comments'),
+    path('trends/', get_sentiment_trends, name='get_sentiment_trends'),
+    path('export/', export_data, name='export_data'),
+    path('monitors/', monitors, name='monitors'),
+    path('monitors/<int:monitor_id>/', monitor_detail, name='monitor_detail'),
+    path('jobs/<int:job_id>/', get_analysis_job, name='get_analysis_job'),
+    path('cache-stats/', get_cache_stats, name='get_cache_stats'),
+    path('metrics/', get_metrics, name='get_metrics'),
     
     path('register/', register_user, name='register_user'),
     path('login/', login_user, name='login_user'),
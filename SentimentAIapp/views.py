@@ -1,69 +1,50 @@
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-import requests
-from .models import Comment, AnalysisHistory
+from .models import Comment, AnalysisHistory, AnalysisJob, MonitoredSource
 import tweepy
 import instaloader
-import time
-import spacy
-import torch
-import re
 import json
+import time
 from bs4 import BeautifulSoup
-from transformers import BertForSequenceClassification, BertTokenizer
-from googleapiclient.discovery import build
 from collections import Counter
-import pandas as pd
+from itertools import islice
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from django.conf import settings
+from django.utils import timezone
+from django.http import HttpResponse, StreamingHttpResponse
 from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework import status
 import logging
 from .auth import get_user_from_token  
+from .sentiment_cache import SentimentCache
+from .jobs import submit_job, serialize_job
+from .persistence import save_analysis
+from .http_client import http_get, prefetch, fetch_pages_concurrently
+from . import platforms, registry
+from .intent import get_detector
+from . import batch, enrichment, export, incremental, metrics, prefilter, ratelimit, streaming, url_cache
+from .monitoring import DEFAULT_MIN_INTERVAL
+from .queries import QueryParamError, apply_filters, keyset_page, daily_sentiment_trend
 from django.contrib.auth.models import User
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-try:
-    nlp = spacy.load("en_core_web_sm")
-    logger.info("Spacy model loaded successfully")
-except Exception as e:
-    logger.error(f"Error loading spacy: {e}")
-    nlp = None
-
-try:
-    bert_model = BertForSequenceClassification.from_pretrained("nlptown/bert-base-multilingual-uncased-sentiment")
-    bert_tokenizer = BertTokenizer.from_pretrained("nlptown/bert-base-multilingual-uncased-sentiment")
-    logger.info("BERT model loaded successfully")
-except Exception as e:
-    logger.error(f"Error loading BERT: {e}")
-    bert_model = None
-    bert_tokenizer = None
-
-L = instaloader.Instaloader()
-
-
-USERNAME = ""
-PASSWORD = ""
-
-try:
-    L.load_session_from_file(USERNAME)
-except FileNotFoundError:
-    L.login(USERNAME, PASSWORD)
-    L.save_session_to_file()
-    
-def calculate_trend_score(sentiments):
-    positive = sentiments.count('POSITIVE')
-    negative = sentiments.count('NEGATIVE')
-    total = len(sentiments)
-    return round((positive / total) * 100, 2) if total > 0 else 0
+sentiment_cache = SentimentCache(registry.model_id())
+
+def calculate_trend_score(sentiment_counts):
+    """Positive share of the counted comments, or None when there were none to score"""
+    positive = sentiment_counts['POSITIVE']
+    total = sum(sentiment_counts.values())
+    return round((positive / total) * 100, 2) if total > 0 else None
 
 @csrf_exempt
 @api_view(['POST', 'GET'])
 def fetch_comments(request):
     logger.info(f"Received {request.method} request to fetch_comments")
-    logger.info(f"Authorization header: {request.META.get('HTTP_AUTHORIZATION', 'None')}")
+    logger.debug(f"Authorization header: {request.META.get('HTTP_AUTHORIZATION', 'None')}")
     
     user = get_user_from_token(request)
     if not user:
@@ -82,8 +63,8 @@ def fetch_comments(request):
         })
     
     try:
-        logger.info(f"Request content type: {request.content_type}")
-        logger.info(f"Request data: {request.data}")
+        logger.debug(f"Request content type: {request.content_type}")
+        logger.debug(f"Request data: {request.data}")
         
         url = request.data.get('url')
         
@@ -94,16 +75,23 @@ def fetch_comments(request):
                 'error': 'URL is required'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        logger.info("Starting comment scraping...")
-        
-        comments_data = scrape_comments(url)
-        # logger.info(f"Scraped comments: {comments_data}")
+        force_refresh = bool(request.data.get('force_refresh'))
+
+        if request.data.get('async'):
+            job, created = submit_job(user, url, force_refresh=force_refresh)
+            logger.info(f"Analysis job {job.id} {'queued' if created else 'already active'}")
+            return Response({
+                'job_id': job.id,
+                'status': job.status,
+                'created': created
+            }, status=status.HTTP_202_ACCEPTED)
+
+        insights = run_url_analysis(url, user, force_refresh=force_refresh)
+        # logger.info(f"Analysis results: {insights}")
         
-        if isinstance(comments_data, dict) and 'error' in comments_data:
-            return Response(comments_data, status=status.HTTP_400_BAD_REQUEST)
+        if isinstance(insights, dict) and 'error' in insights:
+            return Response(insights, status=status.HTTP_400_BAD_REQUEST)
         
-        insights = analyze_comments(comments_data, url, user)
-        # logger.info(f"Analysis results: {insights}")
         return Response(insights)
         
     except json.JSONDecodeError as e:
@@ -115,190 +103,387 @@ def fetch_comments(request):
             'error': f'Analysis failed: {str(e)}'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-# API credentials (Replace with your own)
-TWITTER_API_KEY = ""
-TWITTER_API_SECRET = ""
-TWITTER_ACCESS_TOKEN = ""
-TWITTER_ACCESS_SECRET = ""
-
-# Authenticate Twitter API
-try:
-    auth = tweepy.OAuthHandler(TWITTER_API_KEY, TWITTER_API_SECRET)
-    auth.set_access_token(TWITTER_ACCESS_TOKEN, TWITTER_ACCESS_SECRET)
-    twitter_api = tweepy.API(auth)
-    logger.info("Twitter API authenticated successfully")
-except Exception as e:
-    logger.error(f"Twitter API authentication failed: {e}")
-    twitter_api = None
-
-# YouTube API Key (Replace with your own)
-YOUTUBE_API_KEY = ""
-try:
-    youtube_api = build("youtube", "v3", developerKey=YOUTUBE_API_KEY)
-    logger.info("YouTube API authenticated successfully")
-except Exception as e:
-    logger.error(f"YouTube API authentication failed: {e}")
-    youtube_api = None
-
-def scrape_comments(url):
+YOUTUBE_COMMENT_THREADS_URL = "https://www.googleapis.com/youtube/v3/commentThreads"
+
+ECOMMERCE_REVIEWS_PER_PAGE = 10
+
+DEFAULT_COMMENT_BUDGET = 500
+
+def get_comment_budget(max_comments=None):
+    return max_comments or getattr(settings, 'FETCH_COMMENT_BUDGET', DEFAULT_COMMENT_BUDGET)
+
+def open_comment_stream(url, max_comments=None, known_keys=None):
+    """Return ``comments_data`` whose ``comments`` lazily yields a URL's comments
+
+    Pages are fetched only as ``comments`` is consumed. With ``known_keys``
+    only comments missing from that set are yielded, and their keys are
+    appended to ``comment_keys`` as they go.
+    """
     logger.info(f"Scraping comments from URL: {url}")
-    comments = []
-
-    if "twitter.com" in url:
-        comments = fetch_twitter_replies(url)
-        platform = "Twitter"
-
-    elif "instagram.com" in url:
-        result = fetch_instagram_comments(url)
-        if isinstance(result, dict) and 'error' in result:
-            return result
-        comments = result.get('comments', [])
-        platform = "Instagram"
-
-    elif "youtube.com" in url or "youtu.be" in url:
-        comments = fetch_youtube_comments(url)
-        platform = "YouTube"
-
-    elif "amazon." in url or "flipkart." in url:
-        comments = fetch_ecommerce_reviews(url)
-        platform = "E-commerce"
+    platform = platforms.detect_platform(url)
+
+    if platform == platforms.TWITTER:
+        fetched = iter_twitter_replies(url, max_comments)
+
+    elif platform == platforms.INSTAGRAM:
+        shortcode = platforms.instagram_shortcode(url)
+        if not shortcode:
+            return {"error": "Invalid Instagram URL"}
+        try:
+            fetched = iter_instagram_comments(shortcode, max_comments)
+        except Exception as e:
+            return {"error": f"Error fetching comments: {str(e)}"}
+
+    elif platform == platforms.YOUTUBE:
+        fetched = iter_youtube_comments(url, max_comments)
+
+    elif platform == platforms.ECOMMERCE:
+        fetched = iter_ecommerce_reviews(url, max_comments)
     else:
         return {'error': 'Unsupported platform'}
 
-    logger.info(f"Platform: {platform}, Comments found: {len(comments)}")
-    return {
-        'comments': comments,
-        'platform': platform
-    }
+    comments = streaming.timed(
+        streaming.guarded(fetched, f"{platform} comments"),
+        metrics.fetch_seconds,
+        platform=platform
+    )
+    comments_data = {'platform': platform}
+    if known_keys is not None:
+        comment_keys = incremental.new_key_buffer()
+        comments = incremental.skip_known(comments, known_keys, comment_keys)
+        comments_data['comment_keys'] = comment_keys
+    comments_data['comments'] = comments
+    return comments_data
 
-def fetch_twitter_replies(url):
-    comments = []
-    try:
-        tweet_id = url.split("/")[-1].split("?")[0]
-        replies = tweepy.Cursor(twitter_api.search_tweets, q=f"to:{tweet_id}", tweet_mode='extended').items(50)
-        comments = [reply.full_text for reply in replies if not reply.full_text.startswith('RT')]
-    except Exception as e:
-        print("Error fetching Twitter comments:", e)
-    return comments
-
-def fetch_instagram_comments(url):
-    match = re.search(r"(?:p|reel)/([^/?]+)", url)
-    if not match:
-        return {"error": "Invalid Instagram URL"}
-    shortcode = match.group(1)
-    try:
-        post = instaloader.Post.from_shortcode(L.context, shortcode)
-        comments = []
-        for comment in post.get_comments():
-            comments.append(comment.text)
-        if not comments:
-            return {"error": "No comments found"}
-        return {"comments": comments}
-    except Exception as e:
-        return {"error": f"Error fetching comments: {str(e)}"}
+def iter_twitter_pages(url):
+    """Yield search result pages within Twitter's rate limits, waiting out 429s"""
+    pages = iter(tweepy.Cursor(
+        registry.get('twitter_api').search_tweets,
+        q=f"to:{platforms.tweet_id(url)}",
+        tweet_mode='extended',
+        count=100
+    ).pages())
 
-def fetch_youtube_comments(url):
-    comments = []
-    try:
-        video_id_match = re.search(r"v=([^&]+)", url) or re.search(r"youtu\.be/([^/?]+)", url)
-        if video_id_match:
-            video_id = video_id_match.group(1)
-            response = youtube_api.commentThreads().list(
-                part="snippet",
-                videoId=video_id,
-                maxResults=50
-            ).execute()
-
-            for item in response.get("items", []):
-                comments.append(item["snippet"]["topLevelComment"]["snippet"]["textDisplay"])
-    except Exception as e:
-        print("Error fetching YouTube comments:", e)
-    return comments
+    def next_page():
+        try:
+            return next(pages)
+        except tweepy.TooManyRequests as e:
+            raise ratelimit.Throttled(str(e), retry_after=ratelimit.retry_after(e.response.headers)) from e
 
-def fetch_ecommerce_reviews(url):
-    comments = []
-    headers = {"User-Agent": "Mozilla/5.0"}
-    try:
-        response = requests.get(url, headers=headers)
-        soup = BeautifulSoup(response.content, "html.parser")
-        if "amazon." in url:
-            reviews = soup.find_all("span", {"data-hook": "review-body"})
-        elif "flipkart." in url:
-            reviews = soup.find_all("div", {"class": "t-ZTKy"})
-        comments = [review.get_text(strip=True) for review in reviews[:50]]
-    except Exception as e:
-        print("Error fetching e-commerce reviews:", e)
-    return comments
+    credential = getattr(settings, 'TWITTER_ACCESS_TOKEN', "")
+    while True:
+        try:
+            yield ratelimit.call(platforms.TWITTER, credential, next_page)
+        except StopIteration:
+            return
+
+def iter_twitter_replies(url, max_comments=None):
+    """Yield reply texts page by page, prefetching the next cursor page"""
+    budget = get_comment_budget(max_comments)
+    for page in prefetch(iter_twitter_pages(url)):
+        for reply in page:
+            if reply.full_text.startswith('RT'):
+                continue
+            yield reply.full_text
+            budget -= 1
+            if budget <= 0:
+                return
+
+def iter_instagram_comments(shortcode, max_comments=None):
+    post = instaloader.Post.from_shortcode(registry.get('instaloader').context, shortcode)
+    return islice((comment.text for comment in post.get_comments()), get_comment_budget(max_comments))
+
+def iter_youtube_pages(video_id):
+    api_key = getattr(settings, 'YOUTUBE_API_KEY', "")
+    endpoint = getattr(settings, 'YOUTUBE_COMMENT_THREADS_URL', YOUTUBE_COMMENT_THREADS_URL)
+    page_token = None
+    while True:
+        params = {
+            "part": "snippet",
+            "videoId": video_id,
+            "order": "time",
+            "maxResults": 100,
+            "key": api_key
+        }
+        if page_token:
+            params["pageToken"] = page_token
+        response = http_get(endpoint, params=params, platform=platforms.YOUTUBE, credential=api_key).json()
+        yield response.get("items", [])
+        page_token = response.get("nextPageToken")
+        if not page_token:
+            return
+
+def iter_youtube_comments(url, max_comments=None):
+    """Yield top-level comments, following nextPageToken up to the comment budget"""
+    video_id = platforms.youtube_video_id(url)
+    if not video_id:
+        return
+    budget = get_comment_budget(max_comments)
+    for items in prefetch(iter_youtube_pages(video_id)):
+        for item in items:
+            yield item["snippet"]["topLevelComment"]["snippet"]["textDisplay"]
+            budget -= 1
+            if budget <= 0:
+                return
+
+def ecommerce_page_url(url, page_number):
+    """Page ``page_number`` of a review listing, newest first like the other fetchers
+
+    Incremental analysis stops after a run of known comments, which only
+    works when new reviews come before old ones.
+    """
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query))
+    if "amazon." in url:
+        query["sortBy"] = "recent"
+        page_param = "pageNumber"
+    else:
+        query["sortOrder"] = "MOST_RECENT"
+        page_param = "page"
+    if page_number > 1:
+        query[page_param] = str(page_number)
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+def parse_ecommerce_reviews(url, content):
+    soup = BeautifulSoup(content, "html.parser")
+    if "amazon." in url:
+        reviews = soup.find_all("span", {"data-hook": "review-body"})
+    elif "flipkart." in url:
+        reviews = soup.find_all("div", {"class": "t-ZTKy"})
+    else:
+        reviews = []
+    return [review.get_text(strip=True) for review in reviews]
+
+def iter_ecommerce_reviews(url, max_comments=None):
+    """Yield reviews from numbered review pages, fetched concurrently
+
+    Pages come from the product's review listing; a URL that doesn't identify
+    a product is fetched as a single page. Stops at the first page that
+    repeats the previous one, which is what stores serve past the last page,
+    and skips reviews already yielded.
+    """
+    budget = get_comment_budget(max_comments)
+    reviews_url = platforms.ecommerce_reviews_url(url)
 
-def analyze_comments(comments_data, url, user):
+    def fetch_page(page_number):
+        response = http_get(
+            ecommerce_page_url(reviews_url, page_number) if reviews_url else url,
+            platform=platforms.ECOMMERCE,
+            credential=urlsplit(url).netloc
+        )
+        return parse_ecommerce_reviews(url, response.content)
+
+    max_pages = max(1, -(-budget // ECOMMERCE_REVIEWS_PER_PAGE)) if reviews_url else 1
+    previous = None
+    seen = set()
+    for reviews in fetch_pages_concurrently(fetch_page, range(1, max_pages + 1)):
+        if reviews == previous:
+            return
+        previous = reviews
+        for review in reviews:
+            if review in seen:
+                continue
+            seen.add(review)
+            yield review
+            budget -= 1
+            if budget <= 0:
+                return
+
+def iter_scored_batches(comments, stage_counts=None, engine=None):
+    """Yield ``(indices, labels)`` batches: cache hits, then pre-filter hits, then BERT micro-batches
+
+    ``stage_counts`` is filled with how many comments each stage decided.
+    ``engine`` defaults to the registry's sentiment engine.
+    """
+    stage_counts = {} if stage_counts is None else stage_counts
+    cached = sentiment_cache.get_many(comments)
+    metrics.sentiment_cache_lookups.inc(len(cached), result='hit')
+    metrics.sentiment_cache_lookups.inc(len(comments) - len(cached), result='miss')
+    stage_counts['cache'] = len(cached)
+    if cached:
+        indices = list(cached)
+        yield indices, [cached[index] for index in indices]
+
+    pending = [index for index in range(len(comments)) if index not in cached]
+    pending_comments = [comments[index] for index in pending]
+    if prefilter.is_enabled():
+        resolved, groups, counts = prefilter.PreFilter().split(pending_comments)
+    else:
+        resolved, groups, counts = {}, {i: [] for i in range(len(pending))}, {'model': len(pending)}
+    stage_counts.update({'lexicon': 0, 'duplicate': 0, **counts})
+    for stage, count in stage_counts.items():
+        metrics.comments_scored.inc(count, stage=stage)
+
+    if resolved:
+        indices = list(resolved)
+        yield [pending[i] for i in indices], [resolved[i] for i in indices]
+
+    representatives = list(groups)
+    if representatives:
+        model_comments = [pending_comments[i] for i in representatives]
+        engine = engine or registry.get('sentiment_engine')
+        for batch_indices, batch_labels in engine.iter_predict(model_comments):
+            sentiment_cache.set_many([model_comments[i] for i in batch_indices], batch_labels)
+            indices = []
+            labels = []
+            for i, label in zip(batch_indices, batch_labels):
+                representative = representatives[i]
+                for member in [representative] + groups[representative]:
+                    indices.append(pending[member])
+                    labels.append(label)
+            yield indices, labels
+
+    logger.info(
+        f"Scored {len(comments)} comments: {stage_counts['cache']} cached, {stage_counts['lexicon']} by lexicon, "
+        f"{stage_counts['duplicate']} near-duplicates, {stage_counts['model']} sent to BERT"
+    )
+
+def percent(count, total):
+    return round((count / total) * 100, 2) if total > 0 else 0
+
+def iter_analysis(comments_data, url, user):
+    """Run the analysis, yielding a 'batch' event per scored batch and a final 'summary' event
+
+    ``comments_data['comments']`` may be a lazy iterator. It is consumed in
+    chunks of ANALYSIS_CHUNK_SIZE, each scored before the next is fetched, so
+    memory stays flat however large the thread is. A chunk's comments are
+    written once the next chunk arrives; the last chunk is written together
+    with the AnalysisHistory row, in one transaction. With
+    ANALYSIS_EARLY_STOP_MARGIN set, fetching stops once positive_percent is
+    known to within that many points. When ``comments_data`` carries a
+    ``baseline`` from an earlier incremental run, the new comments' counts
+    are merged into it.
+    """
     logger.info("Starting comment analysis...")
     
-    comments = comments_data.get('comments', [])
     platform = comments_data.get('platform', 'Unknown')
-    
-    if not comments: 
-        logger.warning("No comments found to analyze")
-        return {
-            "positive_percent": 0, 
-            "negative_percent": 0, 
-            "neutral_percent": 0, 
-            "purchase_intent_percent": 0,
-            "total_comments": 0,
-            "platform": platform
-        }
-    
-    sentiments = []
-    purchase_intent_count = 0
-    purchase_words = ['buy', 'purchase', 'order', 'cart', 'checkout', 'will order', 'want to buy']
-    
-    for comment in comments:
-        try:
-            inputs = bert_tokenizer(comment, return_tensors="pt", padding=True, truncation=True, max_length=512)
-            outputs = bert_model(**inputs)
-            sentiment_score = torch.argmax(outputs.logits, axis=1).item()
-            sentiment = 'POSITIVE' if sentiment_score > 3 else 'NEGATIVE'
-            if 'buy' in comment.lower() or 'purchase' in comment.lower():
-                purchase_intent_count += 1
-            sentiments.append(sentiment)
-            
+    baseline = comments_data.get('baseline') or {'POSITIVE': 0, 'NEGATIVE': 0, 'NEUTRAL': 0, 'purchase_intent': 0, 'total': 0}
+    detector = get_detector(platform)
+    counts = Counter({label: baseline[label] for label in ('POSITIVE', 'NEGATIVE', 'NEUTRAL')})
+    new_counts = Counter()
+    purchase_intent_count = baseline['purchase_intent']
+    stage_counts = Counter()
+    keyword_counts = Counter()
+    new_comments = 0
+    scored = 0
+    stopped_early = False
+    pending_rows = []
+
+    try:
+        for chunk in streaming.iter_chunks(comments_data.get('comments', []), streaming.get_chunk_size()):
+            if pending_rows:
+                save_analysis(pending_rows, None)
+                pending_rows = []
+            new_comments += len(chunk)
+            metrics.comments_fetched.inc(len(chunk), platform=platform)
+            purchase_flags, _ = detector.detect(chunk)
+            enriched = enrichment.enrich(chunk) if enrichment.is_enabled() else None
+            if enriched:
+                for _, keywords in enriched:
+                    keyword_counts.update(keywords)
+            chunk_stage_counts = {}
+            # Batches arrive out of fetch order (cache hits first), so rows are keyed by index and written in order
+            comment_rows = {}
             try:
-                Comment.objects.create(
-                    platform=platform,
-                    content=comment,
-                    sentiment=sentiment,
-                    purchase_intent=any(word in comment.lower() for word in purchase_words),
-                    user=user
-                )
-            except Exception as db_error:
-                logger.error(f"Database save error: {db_error}")
-            
-        except Exception as e:
-            logger.error(f"Error analyzing comment: {e}")
-            continue
+                for indices, batch_labels in iter_scored_batches(chunk, chunk_stage_counts, comments_data.get('engine')):
+                    batch_counts = Counter(batch_labels)
+                    batch_intent = 0
+                    for index, sentiment in zip(indices, batch_labels):
+                        if purchase_flags[index]:
+                            batch_intent += 1
+                        comment_rows[index] = Comment(
+                            platform=platform,
+                            content=chunk[index],
+                            sentiment=sentiment,
+                            purchase_intent=purchase_flags[index],
+                            entities=enriched[index][0] if enriched else None,
+                            keywords=enriched[index][1] if enriched else None,
+                            user=user
+                        )
+                    counts.update(batch_counts)
+                    new_counts.update(batch_counts)
+                    purchase_intent_count += batch_intent
+                    scored += len(indices)
+                    running_total = baseline['total'] + scored
 
-    total_comments = len(comments)
-    positive_count = sentiments.count('POSITIVE')
-    negative_count = sentiments.count('NEGATIVE')
-    neutral_count = sentiments.count('NEUTRAL')
-    
-    positive_percent = round((positive_count / total_comments) * 100, 2)
-    negative_percent = round((negative_count / total_comments) * 100, 2)
-    neutral_percent = round((neutral_count / total_comments) * 100, 2)
-    purchase_intent_percent = round((purchase_intent_count / total_comments) * 100, 2)
+                    yield {
+                        'type': 'batch',
+                        'batch_size': len(indices),
+                        'batch_counts': dict(batch_counts),
+                        'scored': scored,
+                        'fetched': baseline['total'] + new_comments,
+                        'positive_percent': percent(counts['POSITIVE'], running_total),
+                        'negative_percent': percent(counts['NEGATIVE'], running_total),
+                        'purchase_intent_percent': percent(purchase_intent_count, running_total),
+                        'platform': platform
+                    }
+            finally:
+                stage_counts.update(chunk_stage_counts)
+                pending_rows = [comment_rows[index] for index in sorted(comment_rows)]
 
-    try:
-        AnalysisHistory.objects.create(
-            user=user,
-            url=url,
-            platform=platform,
-            positive_percent=positive_percent,
-            negative_percent=negative_percent,
-            purchase_intent_percent=purchase_intent_percent,
-            total_comments=total_comments
-        )
-        logger.info("Analysis history saved successfully")
+            if streaming.should_stop_early(new_counts['POSITIVE'], scored):
+                logger.info(f"Stopping early after {scored} comments, positive_percent is within the target margin")
+                stopped_early = True
+                break
+    except GeneratorExit:
+        # The consumer went away mid-stream; keep what was scored, there is no history row to pair it with
+        save_analysis(pending_rows, None)
+        raise
     except Exception as e:
-        logger.error(f"Error saving analysis history: {e}")
+        logger.error(f"Error analyzing comments: {e}")
+
+    if not new_comments and not comments_data.get('baseline'):
+        logger.warning("No comments found to analyze")
+        yield {
+            'type': 'summary',
+            'result': {
+                "positive_percent": 0, 
+                "negative_percent": 0, 
+                "neutral_percent": 0, 
+                "purchase_intent_percent": 0,
+                "total_comments": 0,
+                "platform": platform
+            }
+        }
+        return
+
+    # Comments fetched but never scored (scoring failed partway) are left out of the totals
+    partial = scored < new_comments
+    if partial:
+        logger.warning(f"Only {scored} of {new_comments} comments were scored, reporting a partial result")
+    total_comments = baseline['total'] + scored
+    positive_percent = percent(counts['POSITIVE'], total_comments)
+    negative_percent = percent(counts['NEGATIVE'], total_comments)
+    neutral_percent = percent(counts['NEUTRAL'], total_comments)
+    purchase_intent_percent = percent(purchase_intent_count, total_comments)
+
+    keywords = enrichment.top_keywords(keyword_counts)
+    history = AnalysisHistory(
+        user=user,
+        url=url,
+        platform=platform,
+        positive_percent=positive_percent,
+        negative_percent=negative_percent,
+        purchase_intent_percent=purchase_intent_percent,
+        total_comments=total_comments,
+        trend_score=calculate_trend_score(new_counts),
+        top_keywords=keywords or None,
+        monitor=comments_data.get('monitor')
+    )
+    save_analysis(pending_rows, history)
+    logger.info(f"Analyzed {new_comments} comments from {platform}")
+
+    if 'comment_keys' in comments_data:
+        if scored == new_comments:
+            incremental.save_watermark(user, url, comments_data.get('watermark'), comments_data['comment_keys'], {
+                'POSITIVE': counts['POSITIVE'],
+                'NEGATIVE': counts['NEGATIVE'],
+                'NEUTRAL': counts['NEUTRAL'],
+                'purchase_intent': purchase_intent_count,
+                'total': total_comments
+            })
+        else:
+            logger.warning("Not all new comments were scored, leaving the source watermark unchanged")
 
     result = {
         'positive_percent': positive_percent,
@@ -306,16 +491,182 @@ def analyze_comments(comments_data, url, user):
         'neutral_percent': neutral_percent,
         'purchase_intent_percent': purchase_intent_percent,
         'total_comments': total_comments,
-        'platform': platform
+        'platform': platform,
+        'scored_by': dict(stage_counts),
+        'top_keywords': keywords
     }
+    if 'comment_keys' in comments_data:
+        result['new_comments'] = new_comments
+    if partial:
+        result['partial'] = True
+        result['unscored_comments'] = new_comments - scored
+    if stopped_early:
+        result['stopped_early'] = True
+        result['positive_margin'] = round(streaming.positive_margin(new_counts['POSITIVE'], scored), 2)
     
     # logger.info(f"Analysis completed: {result}")
+    yield {'type': 'summary', 'result': result}
+
+def analyze_comments(comments_data, url, user, progress_callback=None):
+    """Run iter_analysis to completion, reporting (scored, fetched) new comments after each batch"""
+    result = None
+    baseline_total = (comments_data.get('baseline') or {}).get('total', 0)
+    for event in iter_analysis(comments_data, url, user):
+        if event['type'] == 'batch' and progress_callback:
+            progress_callback(event['scored'], event['fetched'] - baseline_total)
+        elif event['type'] == 'summary':
+            result = event['result']
     return result
 
+def scrape_for_analysis(url, user):
+    """Open a lazy comment stream for a URL, skipping seen comments when incremental analysis is on"""
+    if not incremental.is_enabled():
+        return open_comment_stream(url)
+
+    watermark = incremental.load_watermark(user, url)
+    comments_data = open_comment_stream(url, known_keys=incremental.load_known_keys(watermark))
+    if isinstance(comments_data, dict) and 'error' in comments_data:
+        return comments_data
+
+    comments_data['watermark'] = watermark
+    comments_data['baseline'] = incremental.baseline_counts(watermark)
+    return comments_data
+
+def record_cached_analysis(url, user, cached):
+    """Record a history entry for an analysis served from the URL cache"""
+    insights = cached['insights']
+    try:
+        AnalysisHistory.objects.create(
+            user=user,
+            url=url,
+            platform=insights['platform'],
+            positive_percent=insights['positive_percent'],
+            negative_percent=insights['negative_percent'],
+            purchase_intent_percent=insights['purchase_intent_percent'],
+            total_comments=insights['total_comments']
+        )
+    except Exception as e:
+        logger.error(f"Error saving analysis history: {e}")
+    return {**insights, 'cached': True, 'cached_at': cached['cached_at']}
+
+def run_url_analysis(url, user, force_refresh=False, progress_callback=None, monitor=None, engine=None):
+    """Scrape and analyze a URL, serving recent results from the URL cache
+
+    Runs for a ``monitor`` always analyze fresh data and are linked to it
+    in AnalysisHistory. ``engine`` overrides the sentiment engine, e.g. for
+    batch analysis on the scoring process pool.
+    """
+    model_id = registry.model_id()
+    if not force_refresh and monitor is None:
+        cached = url_cache.get_insights(url, model_id, user)
+        metrics.url_cache_lookups.inc(result='hit' if cached else 'miss')
+        if cached:
+            logger.info(f"Serving cached analysis for {url_cache.canonicalize_url(url)}")
+            return record_cached_analysis(url, user, cached)
+
+    started = time.perf_counter()
+    logger.info("Starting comment scraping...")
+    comments_data = scrape_for_analysis(url, user)
+    # logger.info(f"Scraped comments: {comments_data}")
+    if isinstance(comments_data, dict) and 'error' in comments_data:
+        return comments_data
+    comments_data['monitor'] = monitor
+    comments_data['engine'] = engine
+
+    if progress_callback:
+        progress_callback(0, None)
+
+    insights = analyze_comments(
+        comments_data,
+        url,
+        user,
+        progress_callback=progress_callback
+    )
+    if not insights.get('partial'):
+        url_cache.set_insights(url, model_id, user, insights)
+    metrics.analysis_seconds.observe(time.perf_counter() - started, platform=comments_data.get('platform'))
+    return insights
+
+@csrf_exempt
+@api_view(['POST'])
+def batch_analysis(request):
+    """Analyze a list of URLs in parallel and return per-URL insights plus a combined rollup"""
+    user = get_user_from_token(request)
+    if not user:
+        return Response({
+            'error': 'Authentication required. Please login first.'
+        }, status=status.HTTP_401_UNAUTHORIZED)
+
+    urls = request.data.get('urls')
+    if not isinstance(urls, list) or not urls or not all(isinstance(url, str) and url for url in urls):
+        return Response({
+            'error': 'urls must be a non-empty list of URLs'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    max_urls = getattr(settings, 'BATCH_MAX_URLS', batch.DEFAULT_MAX_URLS)
+    if len(urls) > max_urls:
+        return Response({
+            'error': f'At most {max_urls} URLs per batch'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        return Response(batch.analyze_urls(urls, user, force_refresh=bool(request.data.get('force_refresh'))))
+    except Exception as e:
+        logger.error(f"Batch analysis failed: {e}")
+        return Response({
+            'error': f'Analysis failed: {str(e)}'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+def format_stream_event(event, stream_format):
+    payload = json.dumps(event)
+    if stream_format == 'sse':
+        return f"event: {event['type']}\ndata: {payload}\n\n"
+    return payload + "\n"
+
+@csrf_exempt
+@api_view(['POST'])
+def stream_comments(request):
+    """Analyze a URL, streaming per-batch results as NDJSON or server-sent events"""
+    user = get_user_from_token(request)
+    if not user:
+        return Response({
+            'error': 'Authentication required. Please login first.'
+        }, status=status.HTTP_401_UNAUTHORIZED)
+
+    url = request.data.get('url')
+    if not url:
+        return Response({
+            'error': 'URL is required'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    stream_format = request.data.get('stream', 'ndjson')
+    if stream_format not in ('ndjson', 'sse'):
+        return Response({
+            'error': "stream must be 'ndjson' or 'sse'"
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    comments_data = scrape_for_analysis(url, user)
+    if isinstance(comments_data, dict) and 'error' in comments_data:
+        return Response(comments_data, status=status.HTTP_400_BAD_REQUEST)
+
+    def event_stream():
+        try:
+            for event in iter_analysis(comments_data, url, user):
+                yield format_stream_event(event, stream_format)
+        except Exception as e:
+            logger.error(f"Streaming analysis failed: {e}")
+            yield format_stream_event({'type': 'error', 'error': f'Analysis failed: {str(e)}'}, stream_format)
+
+    content_type = 'text/event-stream' if stream_format == 'sse' else 'application/x-ndjson'
+    response = StreamingHttpResponse(event_stream(), content_type=content_type)
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
 @csrf_exempt
 @api_view(['GET'])
 def get_analysis_history(request):
-    """Get user's analysis history"""
+    """Get user's analysis history, newest first, one keyset page at a time"""
     user = get_user_from_token(request)
     if not user:
         return Response({
@@ -323,7 +674,8 @@ def get_analysis_history(request):
         }, status=status.HTTP_401_UNAUTHORIZED)
     
     try:
-        history = AnalysisHistory.objects.filter(user=user).order_by('-created_at')[:10]
+        history = apply_filters(AnalysisHistory.objects.filter(user=user), request.query_params)
+        history, next_cursor = keyset_page(history, request.query_params)
         history_data = []
         
         for analysis in history:
@@ -335,12 +687,242 @@ def get_analysis_history(request):
                 'negative_percent': analysis.negative_percent,
                 'purchase_intent_percent': analysis.purchase_intent_percent,
                 'total_comments': analysis.total_comments,
+                'top_keywords': analysis.top_keywords,
                 'created_at': analysis.created_at.isoformat()
             })
         
-        return Response({'history': history_data})
+        return Response({'history': history_data, 'next_cursor': next_cursor})
         
+    except QueryParamError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         return Response({
             'error': f'Failed to fetch history: {str(e)}'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@csrf_exempt
+@api_view(['GET'])
+def list_comments(request):
+    """Get user's stored comments, newest first, one keyset page at a time"""
+    user = get_user_from_token(request)
+    if not user:
+        return Response({
+            'error': 'Authentication required'
+        }, status=status.HTTP_401_UNAUTHORIZED)
+
+    try:
+        comments = apply_filters(Comment.objects.filter(user=user), request.query_params, sentiment=True)
+        comments = comments.only(
+            'id', 'platform', 'content', 'sentiment', 'purchase_intent', 'entities', 'keywords', 'created_at'
+        )
+        comments, next_cursor = keyset_page(comments, request.query_params)
+
+        return Response({
+            'comments': [
+                {
+                    'id': comment.id,
+                    'platform': comment.platform,
+                    'content': comment.content,
+                    'sentiment': comment.sentiment,
+                    'purchase_intent': comment.purchase_intent,
+                    'entities': comment.entities,
+                    'keywords': comment.keywords,
+                    'created_at': comment.created_at.isoformat()
+                }
+                for comment in comments
+            ],
+            'next_cursor': next_cursor
+        })
+
+    except QueryParamError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({
+            'error': f'Failed to fetch comments: {str(e)}'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@csrf_exempt
+@api_view(['GET'])
+def get_sentiment_trends(request):
+    """Get daily sentiment counts per platform for the user's stored comments"""
+    user = get_user_from_token(request)
+    if not user:
+        return Response({
+            'error': 'Authentication required'
+        }, status=status.HTTP_401_UNAUTHORIZED)
+
+    try:
+        comments = apply_filters(Comment.objects.filter(user=user), request.query_params, sentiment=True)
+        return Response({'trend': daily_sentiment_trend(comments, request.query_params)})
+
+    except QueryParamError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({
+            'error': f'Failed to fetch trends: {str(e)}'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@csrf_exempt
+@api_view(['GET'])
+def export_data(request):
+    """Download the user's stored comments or history as CSV, NDJSON or Parquet, streamed chunk by chunk"""
+    user = get_user_from_token(request)
+    if not user:
+        return Response({
+            'error': 'Authentication required'
+        }, status=status.HTTP_401_UNAUTHORIZED)
+
+    kind = request.query_params.get('kind', 'comments')
+    # Not ``format``: DRF reserves that query parameter for renderer negotiation
+    fmt = request.query_params.get('file_format', 'csv')
+    compress = request.query_params.get('gzip', '').lower() in ('1', 'true', 'yes')
+    try:
+        export.check_format(fmt)
+        queryset = export.export_queryset(kind, request.query_params, user)
+    except (QueryParamError, ImportError) as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    response = StreamingHttpResponse(
+        export.iter_export(queryset, kind, fmt, compress=compress),
+        content_type=export.content_type(fmt, compress),
+    )
+    response['Content-Disposition'] = f'attachment; filename="{export.filename(kind, fmt, compress)}"'
+    return response
+
+def serialize_monitor(monitor):
+    return {
+        'id': monitor.id,
+        'url': monitor.url,
+        'platform': monitor.platform,
+        'interval_seconds': monitor.interval_seconds,
+        'is_active': monitor.is_active,
+        'next_run_at': monitor.next_run_at.isoformat(),
+        'last_run_at': monitor.last_run_at.isoformat() if monitor.last_run_at else None,
+        'last_error': monitor.last_error,
+        'created_at': monitor.created_at.isoformat()
+    }
+
+@csrf_exempt
+@api_view(['GET', 'POST'])
+def monitors(request):
+    """List the user's monitored URLs, or register a new one"""
+    user = get_user_from_token(request)
+    if not user:
+        return Response({
+            'error': 'Authentication required'
+        }, status=status.HTTP_401_UNAUTHORIZED)
+
+    if request.method == 'GET':
+        sources = MonitoredSource.objects.filter(user=user)
+        return Response({'monitors': [serialize_monitor(source) for source in sources]})
+
+    url = request.data.get('url')
+    if not url:
+        return Response({'error': 'URL is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    platform = platforms.detect_platform(url)
+    if not platform:
+        return Response({'error': 'Unsupported platform'}, status=status.HTTP_400_BAD_REQUEST)
+
+    min_interval = getattr(settings, 'MONITOR_MIN_INTERVAL', DEFAULT_MIN_INTERVAL)
+    try:
+        interval_seconds = int(request.data.get('interval_seconds', 3600))
+    except (TypeError, ValueError):
+        return Response({'error': 'interval_seconds must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+    if interval_seconds < min_interval:
+        return Response({
+            'error': f'interval_seconds must be at least {min_interval}'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    monitor = MonitoredSource.objects.create(
+        user=user,
+        url=url,
+        platform=platform,
+        interval_seconds=interval_seconds,
+        next_run_at=timezone.now()
+    )
+    return Response(serialize_monitor(monitor), status=status.HTTP_201_CREATED)
+
+@csrf_exempt
+@api_view(['GET', 'DELETE'])
+def monitor_detail(request, monitor_id):
+    """Get a monitored URL's time series, or stop monitoring it"""
+    user = get_user_from_token(request)
+    if not user:
+        return Response({
+            'error': 'Authentication required'
+        }, status=status.HTTP_401_UNAUTHORIZED)
+
+    try:
+        monitor = MonitoredSource.objects.get(id=monitor_id, user=user)
+    except MonitoredSource.DoesNotExist:
+        return Response({'error': 'Monitor not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    if request.method == 'DELETE':
+        monitor.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    try:
+        points = apply_filters(monitor.points.all(), request.query_params).order_by('created_at')
+        return Response({
+            **serialize_monitor(monitor),
+            'series': [
+                {
+                    'created_at': point.created_at.isoformat(),
+                    'positive_percent': point.positive_percent,
+                    'negative_percent': point.negative_percent,
+                    'purchase_intent_percent': point.purchase_intent_percent,
+                    'total_comments': point.total_comments,
+                    'trend_score': point.trend_score
+                }
+                for point in points
+            ]
+        })
+    except QueryParamError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+@csrf_exempt
+@api_view(['GET'])
+def get_analysis_job(request, job_id):
+    """Get status, progress and result of an analysis job"""
+    user = get_user_from_token(request)
+    if not user:
+        return Response({
+            'error': 'Authentication required'
+        }, status=status.HTTP_401_UNAUTHORIZED)
+
+    try:
+        job = AnalysisJob.objects.get(id=job_id, user=user)
+    except AnalysisJob.DoesNotExist:
+        return Response({
+            'error': 'Job not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    return Response(serialize_job(job))
+
+@csrf_exempt
+@api_view(['GET'])
+def get_cache_stats(request):
+    """Get sentiment cache hit/miss counters for this worker"""
+    user = get_user_from_token(request)
+    if not user:
+        return Response({
+            'error': 'Authentication required'
+        }, status=status.HTTP_401_UNAUTHORIZED)
+
+    return Response({
+        'sentiment_cache': sentiment_cache.stats(),
+        'resource_load_seconds': registry.load_timings()
+    })
+
+@csrf_exempt
+@api_view(['GET'])
+def get_metrics(request):
+    """Expose pipeline timings and counters in the Prometheus text format, summed over workers with METRICS_DIR"""
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if token and request.META.get('HTTP_AUTHORIZATION') != f"Bearer {token}":
+        return Response({
+            'error': 'Authentication required'
+        }, status=status.HTTP_401_UNAUTHORIZED)
+
+    return HttpResponse(metrics.render(), content_type=metrics.CONTENT_TYPE)
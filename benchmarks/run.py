@@ -0,0 +1,253 @@
+#!/usr/bin/env python
+"""Benchmark the scrape -> analyze -> persist pipeline offline.
+
+Stub fetchers serve the recorded comment lists in benchmarks/fixtures and a
+tiny randomly initialized BERT stands in for the production model, so the
+suite needs no network access or model download. Results go to stdout and
+are compared against benchmarks/baseline.json when it exists.
+
+    python benchmarks/run.py
+    python benchmarks/run.py --sizes 100 1000 --repeat 10
+    python benchmarks/run.py --update-baseline
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import resource
+import statistics
+import sys
+import time
+from collections import defaultdict
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "benchmarks.settings")
+
+import django
+
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from SentimentAIapp import registry, views
+from benchmarks.tiny_model import build_engine, load_fixture_comments
+
+FIXTURES_DIR = os.path.join(HERE, "fixtures")
+BASELINE_PATH = os.path.join(HERE, "baseline.json")
+
+FIXTURE_SOURCES = {
+    "youtube_en": ("https://www.youtube.com/watch?v=benchmark01", "iter_youtube_comments"),
+    "multilingual": ("https://www.youtube.com/watch?v=benchmark02", "iter_youtube_comments"),
+    "ecommerce_reviews": ("https://www.amazon.com/dp/B0BENCHM01", "iter_ecommerce_reviews"),
+}
+
+STAGES = ["fetch", "tokenize", "inference", "persist", "total"]
+
+
+class StageTimer:
+    """Accumulates wall time per stage for the current run and keeps one sample per run"""
+
+    def __init__(self):
+        self.current = defaultdict(float)
+        self.samples = defaultdict(list)
+
+    def add(self, stage, seconds):
+        self.current[stage] += seconds
+
+    def wrap(self, stage, func):
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add(stage, time.perf_counter() - started)
+        return timed
+
+    def finish_run(self):
+        for stage in STAGES:
+            self.samples[stage].append(self.current.get(stage, 0.0))
+        self.current = defaultdict(float)
+
+    def reset(self):
+        self.current = defaultdict(float)
+        self.samples = defaultdict(list)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def unique_comments(fixture, size, seed=0):
+    """``size`` distinct comments built from a fixture
+
+    Past the fixture's length each comment gets a few words from the rest of
+    the fixture and its index, so neither the sentiment cache nor window
+    de-duplication can skip the model.
+    """
+    rng = random.Random(seed)
+    words = sorted({word for comment in fixture for word in comment.split()})
+    comments = []
+    for index in range(size):
+        comment = fixture[index % len(fixture)]
+        if index >= len(fixture):
+            comment = f"{comment} {' '.join(rng.sample(words, min(3, len(words))))} {index}"
+        comments.append(comment)
+    return comments
+
+
+def install_stubs(timer, engine):
+    """Route fetchers, tokenization, inference and persistence through the stage timer"""
+    current = {"comments": []}
+
+    def stub_fetcher(url, max_comments=None):
+        comments = iter(current["comments"])
+        while True:
+            started = time.perf_counter()
+            try:
+                comment = next(comments)
+            except StopIteration:
+                return
+            finally:
+                timer.add("fetch", time.perf_counter() - started)
+            yield comment
+
+    for _, fetcher_name in FIXTURE_SOURCES.values():
+        setattr(views, fetcher_name, stub_fetcher)
+
+    engine._tokenize = timer.wrap("tokenize", engine._tokenize)
+    engine.backend.logits = timer.wrap("inference", engine.backend.logits)
+    views.save_analysis = timer.wrap("persist", views.save_analysis)
+    registry.register("sentiment_engine", lambda: engine)
+    return current
+
+
+def run_scenario(timer, current, user, url, comments, repeat):
+    current["comments"] = comments
+    timer.reset()
+    queries = []
+    for _ in range(repeat):
+        views.sentiment_cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            views.run_url_analysis(url, user, force_refresh=True)
+            timer.add("total", time.perf_counter() - started)
+        queries.append(len(captured.captured_queries))
+        timer.finish_run()
+
+    totals = timer.samples["total"]
+    return {
+        "comments": len(comments),
+        "comments_per_sec": round(len(comments) / statistics.median(totals), 1),
+        "queries_per_analysis": max(queries),
+        "stages": {
+            stage: {
+                "p50_ms": round(percentile(timer.samples[stage], 0.5) * 1000, 2),
+                "p95_ms": round(percentile(timer.samples[stage], 0.95) * 1000, 2),
+            }
+            for stage in STAGES
+        },
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of human-readable regressions against the stored baseline"""
+    regressions = []
+    for key, result in results.items():
+        expected = baseline.get(key)
+        if not expected:
+            continue
+        floor = expected["comments_per_sec"] * (1 - tolerance)
+        if result["comments_per_sec"] < floor:
+            regressions.append(
+                f"{key}: {result['comments_per_sec']} comments/s, baseline {expected['comments_per_sec']}"
+            )
+        if result["queries_per_analysis"] > expected["queries_per_analysis"]:
+            regressions.append(
+                f"{key}: {result['queries_per_analysis']} queries/analysis, "
+                f"baseline {expected['queries_per_analysis']}"
+            )
+    return regressions
+
+
+def print_report(results, baseline):
+    header = f"{'scenario':<26}{'comments/s':>12}{'vs base':>9}{'queries':>9}  " + "  ".join(
+        f"{stage + ' p50/p95 ms':>24}" for stage in STAGES
+    )
+    print(header)
+    print("-" * len(header))
+    for key, result in results.items():
+        expected = baseline.get(key)
+        ratio = f"{result['comments_per_sec'] / expected['comments_per_sec']:.2f}x" if expected else "-"
+        stages = "  ".join(
+            f"{result['stages'][stage]['p50_ms']:>11.2f}/{result['stages'][stage]['p95_ms']:<12.2f}"
+            for stage in STAGES
+        )
+        print(f"{key:<26}{result['comments_per_sec']:>12}{ratio:>9}{result['queries_per_analysis']:>9}  {stages}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 2000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--fixtures", nargs="+", default=sorted(FIXTURE_SOURCES))
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed throughput drop before failing")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+
+    db_path = settings.DATABASES["default"]["NAME"]
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    call_command("migrate", run_syncdb=True, verbosity=0)
+    user = User.objects.create_user(username="benchmark", password="benchmark")
+
+    fixtures = load_fixture_comments(FIXTURES_DIR)
+    scenarios = {
+        (name, size): unique_comments(fixtures[name], size)
+        for name in args.fixtures
+        for size in args.sizes
+    }
+    engine = build_engine([comment for comments in scenarios.values() for comment in comments])
+    timer = StageTimer()
+    current = install_stubs(timer, engine)
+
+    results = {}
+    for (name, size), comments in scenarios.items():
+        url, _ = FIXTURE_SOURCES[name]
+        results[f"{name}:{size}"] = run_scenario(timer, current, user, url, comments, args.repeat)
+
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    print_report(results, baseline)
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"\npeak RSS: {peak_rss_mb:.1f} MB")
+
+    if args.update_baseline:
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Baseline written to {BASELINE_PATH}")
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print("\nRegressions:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,34 @@
+"""Minimal Django settings for running the benchmark suite offline against SQLite."""
+import os
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SECRET_KEY = "benchmark-only"
+DEBUG = False
+USE_TZ = True
+
+INSTALLED_APPS = [
+    "django.contrib.contenttypes",
+    "django.contrib.auth",
+    "SentimentAIapp",
+]
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.environ.get("BENCH_DB", os.path.join(BASE_DIR, "benchmarks", "bench.sqlite3")),
+    }
+}
+
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+}
+
+DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+# Measure the full pipeline on every run
+SENTIMENT_CACHE_PERSISTENT = False
+INCREMENTAL_ANALYSIS = False
+ANALYSIS_CACHE_TTLS = {"Twitter": 0, "Instagram": 0, "YouTube": 0, "E-commerce": 0}
+# The lexicon and near-duplicate grouping would keep most comments away from the model
+PREFILTER_ENABLED = False
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+"""Check of the fetch rate limiter against a local stand-in for throttling platform APIs.
+
+The server (SentimentAIapp/tests/stub_server.py, shared with the tests) serves
+YouTube commentThreads pages and Amazon-style review pages from memory. It
+enforces its own token bucket per API key (or per client when no key is sent)
+and a cap on concurrent requests, answering 429 with a Retry-After header once
+either is exceeded.
+
+    python benchmarks/stub_server.py                      # run the check
+    python benchmarks/stub_server.py --analyses 8 --server-rate 3
+    python benchmarks/stub_server.py --serve --port 8765  # just serve
+
+The check points the fetchers at the server with client limits set above the
+server's, then runs several fetches at once. It exits non-zero if any fetch
+comes back short, which would mean throttling turned into lost comments.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from SentimentAIapp.tests.stub_server import StubServer  # noqa: E402
+
+
+def run_check(args):
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "benchmarks.settings")
+
+    import django
+
+    django.setup()
+
+    from django.test.utils import override_settings
+
+    from SentimentAIapp import metrics, platforms, views
+
+    with StubServer(
+        rate=args.server_rate,
+        burst=args.server_burst,
+        max_concurrency=args.server_concurrency,
+        latency=args.latency,
+        comments=args.comments,
+        retry_after=not args.no_retry_after,
+    ) as server:
+        client_limits = {'rate': args.client_rate, 'burst': args.client_rate, 'max_concurrency': args.client_concurrency,
+                         'credential_rate': args.client_rate, 'credential_burst': args.client_rate}
+        overrides = override_settings(
+            YOUTUBE_COMMENT_THREADS_URL=f"{server.url}/youtube/v3/commentThreads",
+            YOUTUBE_API_KEY="stub-key",
+            FETCH_RATE_LIMITS={platforms.YOUTUBE: client_limits, platforms.ECOMMERCE: client_limits},
+            FETCH_THROTTLE_BACKOFF=0.25,
+            FETCH_RATE_LIMIT_MAX_WAIT=args.max_wait,
+        )
+        fetches = []
+        for n in range(args.analyses):
+            fetches.append(("youtube", views.iter_youtube_comments, f"https://www.youtube.com/watch?v=stub{n:04d}"))
+            fetches.append(("ecommerce", views.iter_ecommerce_reviews, f"{server.url}/amazon.com/product-reviews/B0STUB{n:04d}"))
+
+        def fetch(entry):
+            kind, iterate, url = entry
+            try:
+                return kind, len(list(iterate(url, args.comments))), None
+            except Exception as e:
+                return kind, 0, e
+
+        started = time.perf_counter()
+        with overrides, ThreadPoolExecutor(max_workers=len(fetches)) as executor:
+            results = list(executor.map(fetch, fetches))
+        elapsed = time.perf_counter() - started
+        stats = json.loads(views.http_get(f"{server.url}/stats").text)
+
+    failures = [(kind, count, error) for kind, count, error in results if count != args.comments]
+    for kind, count, error in failures:
+        print(f"  {kind}: got {count}/{args.comments} comments" + (f" ({error})" if error else ""))
+    print(f"{len(fetches)} concurrent fetches, {len(fetches) - len(failures)} complete, in {elapsed:.1f}s")
+    print(
+        f"server: {stats['requests']} requests, {stats['served']} served, {stats['throttled']} throttled, "
+        f"max {stats['max_in_flight']} in flight"
+    )
+    throttled = sum(
+        float(line.rsplit(" ", 1)[1])
+        for line in metrics.render().splitlines()
+        if line.startswith("sentiment_fetch_throttled_total{")
+    )
+    print(f"client: {throttled:.0f} throttling responses backed off")
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--serve", action="store_true", help="Only run the server, until Ctrl+C")
+    parser.add_argument("--port", type=int, default=8765, help="Port for --serve (the check uses a free port)")
+    parser.add_argument("--server-rate", type=float, default=5.0, help="Requests/s the server allows per key")
+    parser.add_argument("--server-burst", type=int, default=5, help="Server bucket size per key")
+    parser.add_argument("--server-concurrency", type=int, default=4, help="Concurrent requests the server allows")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds the server takes per page")
+    parser.add_argument("--comments", type=int, default=300, help="Comments served per video or product")
+    parser.add_argument("--no-retry-after", action="store_true", help="Omit Retry-After to exercise exponential backoff")
+    parser.add_argument("--analyses", type=int, default=4, help="Videos and products fetched at once in the check")
+    parser.add_argument("--client-rate", type=float, default=20.0, help="Client limit, set above the server's")
+    parser.add_argument("--client-concurrency", type=int, default=8, help="Client concurrency cap before adapting")
+    parser.add_argument("--max-wait", type=float, default=120.0, help="FETCH_RATE_LIMIT_MAX_WAIT for the check")
+    args = parser.parse_args()
+
+    if not args.serve:
+        sys.exit(run_check(args))
+
+    with StubServer(
+        port=args.port,
+        rate=args.server_rate,
+        burst=args.server_burst,
+        max_concurrency=args.server_concurrency,
+        latency=args.latency,
+        comments=args.comments,
+        retry_after=not args.no_retry_after,
+    ) as server:
+        print(f"Serving throttled stub APIs on {server.url} (YouTube: /youtube/v3/commentThreads), Ctrl+C to stop")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""A randomly initialized BERT with the production architecture, small enough to run offline."""
+import json
+import os
+import re
+import tempfile
+
+import torch
+from transformers import BertConfig, BertForSequenceClassification, BertTokenizer
+
+from SentimentAIapp.backends import TorchBackend
+from SentimentAIapp.inference import BatchInferenceEngine
+
+SPECIAL_TOKENS = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"]
+
+
+def build_vocab(comments):
+    words = set()
+    for comment in comments:
+        for token in re.findall(r"\w+|[^\w\s]", comment.lower()):
+            words.add(token)
+            words.update(token)
+    return SPECIAL_TOKENS + sorted(words)
+
+
+def build_tokenizer(comments):
+    vocab_dir = tempfile.mkdtemp(prefix="bench-vocab-")
+    vocab_path = os.path.join(vocab_dir, "vocab.txt")
+    with open(vocab_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(build_vocab(comments)))
+    return BertTokenizer(vocab_path, do_lower_case=True)
+
+
+def build_model(vocab_size, seed=0):
+    torch.manual_seed(seed)
+    config = BertConfig(
+        vocab_size=vocab_size,
+        hidden_size=64,
+        num_hidden_layers=2,
+        num_attention_heads=2,
+        intermediate_size=128,
+        max_position_embeddings=512,
+        num_labels=5,
+    )
+    return BertForSequenceClassification(config)
+
+
+def build_engine(comments, **engine_options):
+    tokenizer = build_tokenizer(comments)
+    model = build_model(len(tokenizer.vocab))
+    return BatchInferenceEngine(TorchBackend(lambda: model), tokenizer, **engine_options)
+
+
+def load_fixture_comments(fixtures_dir):
+    comments = {}
+    for name in sorted(os.listdir(fixtures_dir)):
+        if name.endswith(".json"):
+            with open(os.path.join(fixtures_dir, name), encoding="utf-8") as f:
+                comments[name[:-5]] = json.load(f)
+    return comments
@@ -0,0 +1,29 @@
+# Gunicorn settings for the Django backend.
+#
+# Set SENTIMENT_PRELOAD=1 to import the app and load BERT in the master
+# process before workers fork, so every worker shares the weights
+# copy-on-write instead of loading its own copy.
+import gc
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+preload_app = os.environ.get("SENTIMENT_PRELOAD", "0") == "1"
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+    from SentimentAIapp import registry
+
+    registry.preload()
+    server.log.info(f"Preloaded resources: {registry.load_timings()}")
+    # Keep the preloaded objects out of future collections so the GC
+    # doesn't touch (and un-share) their pages in the workers
+    gc.freeze()
+
+
+def post_worker_init(worker):
+    # Runs in each worker once the app is loaded, with or without preload_app
+    from SentimentAIapp import jobs
+
+    jobs.start_inline_workers()